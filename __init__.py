@@ -5,22 +5,36 @@ __email__ = 'a@shepetko.com'
 __license__ = 'MIT'
 
 # Public API
-from ._api import on_setup_form, on_setup_widgets, on_render
+from ._api import on_setup_form, on_setup_widgets, on_render, on_export_metrics
 from ._form import Form
-from ._error import FormValidationError, WidgetNotExistError
+from ._batch import Batch
+from ._error import FormValidationError, WidgetNotExistError, CacheOpsBudgetExceeded
+from ._codec import Codec, register_codec
+from ._storage import get_codec_stats, track_cache_ops
 
 
 def plugin_load():
-    from pytsite import cache
+    from pytsite import cache, cron
+    from . import _storage
 
     cache.create_pool('form.form_cid')
     cache.create_pool('form.form_attrs')
     cache.create_pool('form.form_values')
 
+    cron.hourly(_storage.cleanup)
+
+
+def plugin_load_console():
+    from pytsite import console
+    from . import _console_command
+
+    console.register_command(_console_command.Metrics())
+
 
 def plugin_load_wsgi():
+    from pytsite import reg
     from plugins import http_api
-    from . import _http_api_controllers
+    from . import _http_api_controllers, _metrics
 
     http_api.handle('POST', 'form/widgets/<__form_uid>/<__form_step>', _http_api_controllers.PostGetWidgets,
                     'form@post_get_widgets')
@@ -28,3 +42,7 @@ def plugin_load_wsgi():
                     'form@post_validate')
     http_api.handle('POST', 'form/submit/<__form_uid>', _http_api_controllers.PostSubmit,
                     'form@post_submit')
+    http_api.handle('GET', 'form/metrics', _http_api_controllers.GetMetrics, 'form@get_metrics')
+
+    if _metrics.is_enabled():
+        _metrics.start_exporter(reg.get('form.metrics_export_interval', 60))
@@ -6,23 +6,26 @@ __license__ = 'MIT'
 
 from typing import Callable as _Callable
 from pytsite import util as _util, cache as _cache, logger as _logger, http as _http, events as _events
-from . import _form
+from . import _form, _storage, _metrics, _hooks
 
 
 def dispense(request: _http.Request, uid: str) -> _form.Form:
     """Dispense a form
     """
     try:
-        # Determine form's class
-        cid = uid.replace('cid:', '') if uid.startswith('cid:') else _cache.get_pool('form.form_cid').get(uid)
-        cls = _util.get_module_attr(cid)
+        with _metrics.measure('dispense') as m:
+            # Determine form's class
+            cid = uid.replace('cid:', '') if uid.startswith('cid:') else _storage.get_pool('form.form_cid').get(uid)
+            cls = _util.get_module_attr(cid)
 
-        # Prevent instantiating other classes via HTTP API
-        if not issubclass(cls, _form.Form):
-            raise RuntimeError('Form class is not found')
+            # Prevent instantiating other classes via HTTP API
+            if not issubclass(cls, _form.Form):
+                raise RuntimeError('Form class is not found')
 
-        # Instantiate form
-        return cls(request) if uid.startswith('cid:') else cls(request, _uid=uid)
+            m.cid = cid
+
+            # Instantiate form
+            return cls(request) if uid.startswith('cid:') else cls(request, _uid=uid)
 
     except _cache.error.KeyNotExist:
         raise RuntimeError('Invalid form UID')
@@ -36,16 +39,22 @@ def dispense(request: _http.Request, uid: str) -> _form.Form:
 def on_setup_form(form_name: str, handler: _Callable[[_form.Form], None], priority: int = 0):
     """Shortcut
     """
-    _events.listen('form@setup_form.' + form_name, handler, priority)
+    _hooks.listen('setup_form', form_name, handler, priority)
 
 
 def on_setup_widgets(form_name: str, handler: _Callable[[_form.Form], None], priority: int = 0):
     """Shortcut
     """
-    _events.listen('form@setup_widgets.' + form_name, handler, priority)
+    _hooks.listen('setup_widgets', form_name, handler, priority)
 
 
 def on_render(form_name: str, handler: _Callable[[_form.Form], None], priority: int = 0):
     """Shortcut
     """
-    _events.listen('form@render.' + form_name, handler, priority)
+    _hooks.listen('render', form_name, handler, priority)
+
+
+def on_export_metrics(handler: _Callable[[list], None], priority: int = 0):
+    """Shortcut
+    """
+    _events.listen('form@export_metrics', handler, priority)
@@ -0,0 +1,95 @@
+"""PytSite Form Plugin Batch Processing
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import multiprocessing as _multiprocessing
+from copy import deepcopy as _deepcopy
+from typing import Iterable as _Iterable, Iterator as _Iterator, Mapping as _Mapping, Tuple as _Tuple
+from . import _error, _form
+
+# Batch which is being processed by worker processes
+_current = None  # type: Batch
+
+
+def _validate(payload: _Mapping) -> dict:
+    """Validate a payload in a worker process
+    """
+    return _current.validate(payload)
+
+
+class Batch:
+    """Batch Validator
+
+    Sets up form's widgets once and then validates any number of payloads against them. Nothing is written to cache.
+    """
+
+    def __init__(self, frm: _form.Form):
+        """Init
+        """
+        self._form = frm
+
+        # Batch must not touch cache, neither while restoring nor while filling values. Forms which have been already
+        # cached while constructing, e.g. multi-step ones, leave nothing behind.
+        frm._clear_cache()
+        frm._cache = False
+
+        # Setup widgets for all steps
+        for step in range(1, frm.steps + 1):
+            frm.current_step = step
+            frm.setup_widgets()
+
+        # Initial widgets' values, which are restored before processing of each payload
+        self._initial_values = [(w, w.get_val()) for w in frm.get_widgets()]
+
+    @property
+    def form(self) -> _form.Form:
+        """Get form
+        """
+        return self._form
+
+    def reset(self):
+        """Reset widgets' values
+        """
+        for w, v in self._initial_values:
+            w.set_val(_deepcopy(v))
+
+        self._form.reset_values()
+
+        return self
+
+    def validate(self, payload: _Mapping) -> dict:
+        """Validate a payload
+
+        Returns errors keyed by widgets' UIDs, empty dict means that the payload is valid.
+        """
+        self.reset()
+
+        try:
+            self._form.fill(payload).validate()
+        except (_error.FormFillError, _error.FormValidationError) as e:
+            return e.errors
+
+        return {}
+
+    def validate_many(self, payloads: _Iterable[_Mapping], processes: int = 0,
+                      chunk_size: int = 100) -> _Iterator[_Tuple[int, dict]]:
+        """Validate multiple payloads
+
+        Yields payload's index and its errors. If `processes` is greater than zero, payloads are validated in a pool of
+        forked worker processes, which inherit already set up form.
+        """
+        global _current
+
+        if processes < 1:
+            for i, payload in enumerate(payloads):
+                yield i, self.validate(payload)
+            return
+
+        _current = self
+        try:
+            with _multiprocessing.get_context('fork').Pool(processes) as pool:
+                yield from enumerate(pool.imap(_validate, payloads, chunk_size))
+        finally:
+            _current = None
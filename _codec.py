@@ -0,0 +1,127 @@
+"""PytSite Form Plugin Cached Values Codecs
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import bz2 as _bz2
+import lzma as _lzma
+import zlib as _zlib
+from abc import ABC as _ABC, abstractmethod as _abstractmethod
+from typing import Dict as _Dict
+
+_codecs = {}  # type: _Dict[str, Codec]
+
+
+class Codec(_ABC):
+    """Abstract Codec
+
+    Transforms already serialized values before they are put into the cache and back after they are read from it.
+    """
+
+    @property
+    @_abstractmethod
+    def name(self) -> str:
+        """Get name of the codec
+        """
+        raise NotImplementedError()
+
+    @_abstractmethod
+    def encode(self, data: bytes) -> bytes:
+        """Encode data
+        """
+        raise NotImplementedError()
+
+    @_abstractmethod
+    def decode(self, data: bytes) -> bytes:
+        """Decode data
+        """
+        raise NotImplementedError()
+
+
+class Plain(Codec):
+    """Plain Codec
+    """
+
+    @property
+    def name(self) -> str:
+        return 'plain'
+
+    def encode(self, data: bytes) -> bytes:
+        return data
+
+    def decode(self, data: bytes) -> bytes:
+        return data
+
+
+class Zlib(Codec):
+    """Zlib Codec
+    """
+
+    def __init__(self, level: int = 6):
+        self._level = level
+
+    @property
+    def name(self) -> str:
+        return 'zlib'
+
+    def encode(self, data: bytes) -> bytes:
+        return _zlib.compress(data, self._level)
+
+    def decode(self, data: bytes) -> bytes:
+        return _zlib.decompress(data)
+
+
+class BZ2(Codec):
+    """BZ2 Codec
+    """
+
+    @property
+    def name(self) -> str:
+        return 'bz2'
+
+    def encode(self, data: bytes) -> bytes:
+        return _bz2.compress(data)
+
+    def decode(self, data: bytes) -> bytes:
+        return _bz2.decompress(data)
+
+
+class LZMA(Codec):
+    """LZMA Codec
+    """
+
+    @property
+    def name(self) -> str:
+        return 'lzma'
+
+    def encode(self, data: bytes) -> bytes:
+        return _lzma.compress(data)
+
+    def decode(self, data: bytes) -> bytes:
+        return _lzma.decompress(data)
+
+
+def register_codec(codec: Codec):
+    """Register a codec
+    """
+    if not isinstance(codec, Codec):
+        raise TypeError('Instance of {} expected, got {}'.format(Codec, type(codec)))
+
+    if codec.name in _codecs:
+        raise RuntimeError("Codec '{}' is already registered".format(codec.name))
+
+    _codecs[codec.name] = codec
+
+
+def get_codec(name: str) -> Codec:
+    """Get a registered codec
+    """
+    try:
+        return _codecs[name]
+    except KeyError:
+        raise RuntimeError("Codec '{}' is not registered".format(name))
+
+
+for _c in (Plain(), Zlib(), BZ2(), LZMA()):
+    register_codec(_c)
@@ -0,0 +1,39 @@
+"""PytSite Form Plugin Console Commands
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+from pytsite import console as _console
+from . import _metrics
+
+
+class Metrics(_console.Command):
+    """Dump forms' metrics collected by processes
+    """
+
+    @property
+    def name(self) -> str:
+        """Get name of the command
+        """
+        return 'form:metrics'
+
+    @property
+    def description(self) -> str:
+        """Get description of the command
+        """
+        return 'form@metrics_console_command_description'
+
+    def exec(self):
+        """Execute the command
+        """
+        row_fmt = '{:<20} {:<60} {:>4} {:>8} {:>10} {:>10} {:>10} {:>10}'
+
+        for pid, metrics in sorted(_metrics.load_dumps().items()):
+            _console.print_info('PID {}'.format(pid))
+            _console.print_normal(row_fmt.format('phase', 'cid', 'step', 'count', 'p50, ms', 'p95, ms', 'p99, ms',
+                                                 'max, ms'))
+            for m in metrics:
+                _console.print_normal(row_fmt.format(m['phase'], m['cid'], m['step'], m['count'],
+                                                     '{:.2f}'.format(m['p50']), '{:.2f}'.format(m['p95']),
+                                                     '{:.2f}'.format(m['p99']), '{:.2f}'.format(m['max'])))
@@ -40,3 +40,18 @@ class WidgetNotExistError(Error):
 
     def __str__(self):
         return "Widget '{}' does not exist".format(self._uid)
+
+
+class CacheOpsBudgetExceeded(Error):
+    """Cache Operations Budget Exceeded Error
+    """
+
+    def __init__(self, name: str, ops: int, max_ops: int):
+        """Init
+        """
+        self._name = name
+        self._ops = ops
+        self._max_ops = max_ops
+
+    def __str__(self):
+        return "'{}' performed {} cache operations while {} allowed".format(self._name, self._ops, self._max_ops)
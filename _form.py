@@ -5,47 +5,138 @@ __email__ = 'a@shepetko.com'
 __license__ = 'MIT'
 
 import re as _re
-from typing import List as _List, Optional as _Optional, Mapping as _Mapping
+from typing import List as _List, Optional as _Optional, Mapping as _Mapping, Callable as _Callable, \
+    Tuple as _Tuple
 from abc import ABC as _ABC, abstractmethod as _abstractmethod
 from collections import OrderedDict as _OrderedDict
 from datetime import datetime as _datetime
 from math import ceil as _ceil
-from pytsite import util as _util, router as _router, validation as _validation, tpl as _tpl, events as _events, \
-    lang as _lang, reg as _reg, cache as _cache, http as _http, routing as _routing
+from pytsite import util as _util, router as _router, validation as _validation, tpl as _tpl, lang as _lang, \
+    reg as _reg, cache as _cache, http as _http, routing as _routing, events as _events
 from plugins import widget as _widget, http_api as _http_api
-from . import _error
+from . import _error, _storage, _metrics, _profiler, _shell, _hooks
 
 _CACHE_TTL = _reg.get('form.cache_ttl', 604800)  # 7 days
+_SHELL_CACHE = _reg.get('form.shell_cache', True)
+
+# Package names, class IDs and class IDs' CSS classes of form classes
+_PACKAGE_NAMES = {}
+_CIDS = {}
+_CID_CSS = {}
+
+# Marks values which are built on first access
+_LAZY = object()
+
+# Types of attribute values which cannot be changed in place
+_IMMUTABLE_ATTR_TYPES = (str, int, float, bool, type(None))
+
+# Message IDs resolved to translations of forms' own packages
+_MSG_IDS = {}
 _F_NAME_SUB_RE = _re.compile('[^a-zA-Z0-9_]+')
 _CSS_SUB_RE = _re.compile('[^a-zA-Z0-9\-]+')
 
 
+class _Attrs(dict):
+    """Copy-on-write Form's Attributes
+
+    Holds only attributes set on the instance, the rest are read from shared defaults. Defaults equal to `_LAZY` are
+    built by the form on first access.
+    """
+
+    __slots__ = ('_defaults', '_factory')
+
+    def __init__(self, defaults: dict, factory: _Callable[[str], object]):
+        """Init
+        """
+        super().__init__()
+        self._defaults = defaults
+        self._factory = factory
+
+    def __missing__(self, k: str):
+        v = self._defaults[k]
+        if v is _LAZY:
+            v = self[k] = self._factory(k)
+
+        return v
+
+    def __contains__(self, k: str) -> bool:
+        return dict.__contains__(self, k) or k in self._defaults
+
+    def get(self, k: str, default=None):
+        return self[k] if k in self else default
+
+    def to_dict(self) -> dict:
+        """Get all attributes, including defaults
+        """
+        r = {k: self[k] for k in self._defaults}
+        r.update(self)
+
+        return r
+
+
 class Form(_ABC):
     """Base Form
     """
 
+    __slots__ = ('_request', '_widgets', '_values', '_initial_values', '_cached_values', '_last_widget_weight', '_cid',
+                 '_uid', '_current_step', '_cache', '_submit_button', '_attrs', '__weakref__')
+
+    # Form's areas where widgets can be placed
+    _areas = ('hidden', 'header', 'body', 'footer')
+
+    # Default values of form's attributes. Subclasses may override it to change defaults of all their instances.
+    _default_attrs = {
+        'created': _LAZY,
+        'name': '',
+        'enctype': 'application/x-www-form-urlencoded',
+        'method': 'post',
+        'action': '',
+        'data': _LAZY,
+        'location': _LAZY,
+        'referer': _LAZY,
+        'redirect': _LAZY,
+        'steps': 1,
+        'update_location_hash': False,
+        'css': 'pytsite-form',
+        'area_hidden_css': '',
+        'area_header_css': '',
+        'area_body_css': '',
+        'area_footer_css': '',
+        'messages_css': 'form-messages',
+        'get_widgets_ep': 'form/widgets',
+        'validation_ep': 'form/validate',
+        'tpl': 'form@form',
+        'title': '',
+        'hide_title': False,
+        'title_css': '',
+    }
+
     def __init__(self, request: _http.Request, **kwargs):
         """Init
         """
         # Request
         self._request = request
 
-        # Cache pools
-        self._cids_cache = _cache.get_pool('form.form_cid')
-        self._attrs_cache = _cache.get_pool('form.form_attrs')
-        self._values_cache = _cache.get_pool('form.form_values')
-
         # Widgets
         self._widgets = []  # type: _List[_widget.Abstract]
 
-        # Form's areas where widgets can be placed
-        self._areas = ('hidden', 'header', 'body', 'footer')
+        # Memoized widgets, their values and values mapping
+        self._values = None  # type: _Optional[_Tuple[list, list, _OrderedDict]]
+
+        # Widgets' values restored from cache or set while widgets were set up, to compare changed values with
+        self._initial_values = {}
+
+        # Widgets' values which are currently stored in cache
+        self._cached_values = {}
 
         # Last widget's weight
-        self._last_widget_weight = {k: 0 for k in self._areas}
+        self._last_widget_weight = dict.fromkeys(self._areas, 0)
 
         # Form's class ID
-        self._cid = '{}.{}'.format(self.__module__, self.__class__.__name__)
+        try:
+            self._cid = _CIDS[self.__class__]
+        except KeyError:
+            self._cid = _CIDS[self.__class__] = '{}.{}'.format(self.__module__, self.__class__.__name__)
 
         # Form's UID
         self._uid = None  # type: str
@@ -56,54 +147,24 @@ class Form(_ABC):
         # Should form be cached
         self._cache = False
 
-        # Default submit button
-        self._submit_button = _widget.button.Submit(
-            weight=200,
-            uid='action_submit',
-            value=_lang.t('form@save'),
-            color='primary',
-            form_area='footer',
-            css='form-action-submit',
-            icon='fa fas fa-fw fa-check',
-        )
+        # Default submit button, created on first access
+        self._submit_button = _LAZY
 
         # Form's attributes. This dict holds all form's attributes that can be set from outside.
         # Using dict instead of separate object's properties motivated by large amount of variables and necessity of
         # caching them in convenient manner
-        self._attrs = {
-            'created': _datetime.now(),
-            'name': '',
-            'enctype': 'application/x-www-form-urlencoded',
-            'method': 'post',
-            'action': '',
-            'data': {},
-            'location': request.url,
-            'referer': request.referrer,
-            'redirect': self._request.inp.get('__redirect'),
-            'steps': 1,
-            'update_location_hash': False,
-            'css': 'pytsite-form',
-            'area_hidden_css': '',
-            'area_header_css': '',
-            'area_body_css': '',
-            'area_footer_css': '',
-            'messages_css': 'form-messages',
-            'get_widgets_ep': 'form/widgets',
-            'validation_ep': 'form/validate',
-            'tpl': 'form@form',
-            'title': '',
-            'hide_title': False,
-            'title_css': '',
-        }
+        self._attrs = _Attrs(self._default_attrs, self._build_attr)
 
         # Presence of '_uid' kwarg means that form's is being reconstructed by _api.dispense()
         if '_uid' in kwargs:
             self._uid = kwargs.pop('_uid')
 
             # Restore form's attributes from cache
-            if self._attrs_cache.has(self._uid):
-                self._cache = True
+            try:
                 self._attrs.update(self._attrs_cache.get_hash(self._uid))
+                self._cache = True
+            except _cache.error.KeyNotExist:
+                pass
 
             # This attributes must be overwritten
             for k in ('location', 'referer', 'redirect'):
@@ -112,10 +173,11 @@ class Form(_ABC):
                     self.set_attr(k, v)
 
             # Perform form's setup
-            self._on_setup_form()
+            with _metrics.measure('setup_form', self._cid):
+                self._on_setup_form()
 
-            # Form setup event
-            _events.fire('form@setup_form.' + self.name, frm=self)
+            # Form setup hook
+            _hooks.dispatch('setup_form', self)
 
         # Normal form initialization
         else:
@@ -124,7 +186,8 @@ class Form(_ABC):
                 self.set_attr(k, v)
 
             # Perform form's setup
-            self._on_setup_form()
+            with _metrics.measure('setup_form', self._cid):
+                self._on_setup_form()
 
             # Set form's UID if it still not set
             if not self._uid:
@@ -141,11 +204,44 @@ class Form(_ABC):
                 except _routing.error.RuleNotFound:
                     pass
 
-            # Form setup event
-            _events.fire('form@setup_form.' + self.name, frm=self)
+            # Form setup hook
+            _hooks.dispatch('setup_form', self)
 
             # Add convenient CSS classes
-            self.css += ' form-cid-{}'.format(_CSS_SUB_RE.sub('-', self._cid.lower()).replace('--', '-'))
+            try:
+                cid_css = _CID_CSS[self._cid]
+            except KeyError:
+                cid_css = ' form-cid-' + _CSS_SUB_RE.sub('-', self._cid.lower()).replace('--', '-')
+                _CID_CSS[self._cid] = cid_css
+            self.css += cid_css
+
+    @property
+    def _cids_cache(self) -> _storage.Pool:
+        return _storage.get_pool('form.form_cid')
+
+    @property
+    def _attrs_cache(self) -> _storage.Pool:
+        return _storage.get_pool('form.form_attrs')
+
+    @property
+    def _values_cache(self) -> _storage.Pool:
+        return _storage.get_pool('form.form_values')
+
+    def _build_attr(self, k: str):
+        """Build value of a lazy attribute
+        """
+        if k == 'created':
+            return _datetime.now()
+        elif k == 'data':
+            return {}
+        elif k == 'location':
+            return self._request.url
+        elif k == 'referer':
+            return self._request.referrer
+        elif k == 'redirect':
+            return self._request.inp.get('__redirect')
+
+        raise KeyError(k)
 
     def _build_uid(self) -> str:
         """Build form's UID
@@ -158,18 +254,19 @@ class Form(_ABC):
 
             # Prepare cache
             self._cids_cache.put(uid, self._cid, _CACHE_TTL)
-            self._attrs_cache.put_hash(uid, self._attrs, _CACHE_TTL)
+            self._attrs_cache.put_hash(uid, self._attrs.to_dict(), _CACHE_TTL)
 
             return uid
         else:
             return 'cid:{}'.format(self._cid)
 
+    @_metrics.timed('setup_widgets')
     def setup_widgets(self):
         """Setup widgets
         """
         # 'Submit' button for the last step
-        if self.steps == self._current_step and self._submit_button:
-            self.add_widget(self._submit_button)
+        if self.steps == self._current_step and self.submit_button:
+            self.add_widget(self.submit_button)
 
         # 'Next' button for all steps except the last one
         if self._current_step < self.steps:
@@ -205,19 +302,27 @@ class Form(_ABC):
         self._on_setup_widgets()
 
         # Ask others to setup form's widgets
-        _events.fire('form@setup_widgets.' + self.name, frm=self)
+        _hooks.dispatch('setup_widgets', self)
 
         # Restore widgets' values
         if self._cache:
             try:
-                for k, v in _cache.get_pool('form.form_values').get_hash(self._uid).items():
+                for k, v in self._values_cache.get_hash(self._uid).items():
                     try:
                         self.get_widget(k).set_val(v)
+                        self._cached_values[k] = v
                     except _error.WidgetNotExistError:
                         pass
             except _cache.error.KeyNotExist:
                 pass
 
+        # Remember initial values of newly set up widgets
+        for w in self.get_widgets():
+            if w.uid not in self._initial_values:
+                self._initial_values[w.uid] = w.get_val()
+
+        self.reset_values()
+
         return self
 
     def _on_setup_form(self):
@@ -247,6 +352,13 @@ class Form(_ABC):
             self._uid = self._build_uid()
 
         if self._cache:
+            # Immutable attributes set to the same values on every request, like name, are not written again. Mutable
+            # ones may have been changed in place, so they compare equal to themselves and must be written anyway.
+            if isinstance(v, _IMMUTABLE_ATTR_TYPES) and k in self._attrs:
+                cur = self._attrs[k]
+                if type(cur) is type(v) and cur == v:
+                    return
+
             self._attrs[k] = v
             self._attrs_cache.put_hash_item(self._uid, k, v)
         else:
@@ -259,7 +371,7 @@ class Form(_ABC):
                 self._uid = self._build_uid()
 
                 # Put existing attributes to cache
-                self._attrs_cache.put_hash(self._uid, self._attrs, _CACHE_TTL)
+                self._attrs_cache.put_hash(self._uid, self._attrs.to_dict(), _CACHE_TTL)
             else:
                 self._attrs[k] = v
 
@@ -275,6 +387,12 @@ class Form(_ABC):
         """
         return self._areas
 
+    @property
+    def cid(self) -> str:
+        """Get class ID
+        """
+        return self._cid
+
     @property
     def uid(self) -> str:
         """Get UID
@@ -582,8 +700,25 @@ class Form(_ABC):
         """
         self.set_attr('tpl', value)
 
+    @property
+    def assets(self) -> _List[str]:
+        """Get deduplicated assets of form's widgets which are currently set up
+        """
+        return list(_OrderedDict.fromkeys(a for w in self.get_widgets() for a in getattr(w, 'assets', ())))
+
     @property
     def submit_button(self) -> _Optional[_widget.button.Submit]:
+        if self._submit_button is _LAZY:
+            self._submit_button = _widget.button.Submit(
+                weight=200,
+                uid='action_submit',
+                value=_lang.t('form@save'),
+                color='primary',
+                form_area='footer',
+                css='form-action-submit',
+                icon='fa fas fa-fw fa-check',
+            )
+
         return self._submit_button
 
     @submit_button.setter
@@ -596,45 +731,92 @@ class Form(_ABC):
     @property
     def values(self) -> _OrderedDict:
         """Get form's values
+
+        Values mapping is memoized while form's widgets and identities of their values stay the same, so values set
+        to widgets directly are never missed.
         """
-        r = _OrderedDict([(w.uid, w.get_val()) for w in self.get_widgets()])
+        widgets = self.get_widgets()
+        values = [w.get_val() for w in widgets]
+
+        memo = self._values
+        if memo is None or len(memo[0]) != len(widgets) or any(a is not b for a, b in zip(memo[0], widgets)) or \
+                any(a is not b for a, b in zip(memo[1], values)):
+            r = _OrderedDict(zip((w.uid for w in widgets), values))
 
-        # Sometimes widgets can have different UID and name
-        r.update(_OrderedDict([(w.name, w.get_val()) for w in self.get_widgets()]))
+            # Sometimes widgets can have different UID and name
+            r.update(zip((w.name for w in widgets), values))
+
+            memo = self._values = (widgets, values, r)
+
+        return memo[2].copy()
+
+    @property
+    def changed_values(self) -> _OrderedDict:
+        """Get form's values which differ from initial ones
+
+        Initial values are ones restored from cache or, if widget's value was not cached, set while widgets were set
+        up. Values of buttons are not included.
+        """
+        r = _OrderedDict()
+
+        for w in self.get_widgets():
+            if isinstance(w, (_widget.button.Submit, _widget.button.Button)):
+                continue
+
+            v = w.get_val()
+            if w.uid not in self._initial_values or self._initial_values[w.uid] != v:
+                r[w.uid] = v
+                r[w.name] = v
 
         return r
 
+    def reset_values(self):
+        """Reset memoized form's values
+        """
+        self._values = None
+
+        return self
+
     @property
     def fields(self) -> list:
         """Get list of names of widgets
         """
         return [w.uid for w in self.get_widgets()]
 
+    @_metrics.timed('fill')
     def fill(self, values: _Mapping):
         """Fill form's widgets with values
         """
         errors = {}
 
         # Create form's cache placeholder
-        if self._cache:
-            try:
-                self._values_cache.get_hash(self._uid)
-            except _cache.error.KeyNotExist:
-                self._values_cache.put_hash(self._uid, {}, _CACHE_TTL)
+        if self._cache and not self._values_cache.has(self._uid):
+            self._values_cache.put_hash(self._uid, {}, _CACHE_TTL)
 
         # Fill widgets in order they placed on the form
+        changed = {}
         for widget in self.get_widgets(self._current_step):
             widget_key = widget.uid or widget.name
             if widget_key in values:
                 try:
                     widget.value = values[widget_key]
-                    if self._cache:
-                        self._values_cache.put_hash_item(self._uid, widget.uid, widget.value)
+
+                    # Only changed values are written to cache
+                    v = widget.value
+                    if self._cache and (widget.uid not in self._cached_values or
+                                        self._cached_values[widget.uid] != v):
+                        changed[widget.uid] = v
                 except Exception as e:
                     if widget_key not in errors:
                         errors[widget_key] = []
                     errors[widget_key].append(str(e))
 
+        if changed:
+            self._values_cache.put_hash_items(self._uid, changed)
+            self._cached_values.update(changed)
+
+        self.reset_values()
+
         if errors:
             raise _error.FormFillError(errors)
 
@@ -662,6 +844,7 @@ class Form(_ABC):
 
         return self
 
+    @_metrics.timed('validate')
     def validate(self):
         """Validate the form
         """
@@ -683,6 +866,7 @@ class Form(_ABC):
 
         return self
 
+    @_metrics.timed('submit')
     def submit(self):
         """Should be called by endpoint when it processing form submit
         """
@@ -694,19 +878,41 @@ class Form(_ABC):
         r = self._on_submit()
 
         # Clear cache
+        self._clear_cache()
+
+        return r
+
+    def _clear_cache(self):
+        """Remove form's state from cache
+        """
         if self._cache:
             self._attrs_cache.rm(self._uid)
             self._cids_cache.rm(self._uid)
             self._values_cache.rm(self._uid)
 
-        return r
-
+    @_metrics.timed('render')
     def render(self) -> str:
         """Render the form
         """
-        _events.fire('form@render.' + self.name, frm=self)
+        with _profiler.profile('render', self._cid):
+            # Form's shell can be taken from cache only if nothing can modify the form or its template while rendering
+            if _SHELL_CACHE and self.tpl == 'form@form' and not self.data and \
+                    not _hooks.has_listeners('render', self.name) and \
+                    not _events.listeners('pytsite.tpl@resolve_location') and \
+                    not _events.listeners('pytsite.tpl@render'):
+                key = _shell.build_key(self, _lang.get_current())
+                try:
+                    hash(key)
+                except TypeError:
+                    # Some of attributes are not hashable
+                    key = None
+
+                if key is not None:
+                    return _shell.render(self, key, lambda frm: _tpl.render(self.tpl, {'form': frm}))
+
+            _hooks.dispatch('render', self)
 
-        return _tpl.render(self.tpl, {'form': self})
+            return _tpl.render(self.tpl, {'form': self})
 
     def __str__(self) -> str:
         """Render the form
@@ -727,6 +933,7 @@ class Form(_ABC):
 
         self._widgets.append(widget)
         self._widgets.sort(key=lambda x: x.weight)
+        self.reset_values()
 
         return widget
 
@@ -744,6 +951,8 @@ class Form(_ABC):
             replacement.replaces = source_uid
             self.remove_widget(source_uid).add_widget(replacement)
 
+        self.reset_values()
+
         return replacement
 
     def hide_widget(self, uid):
@@ -809,12 +1018,15 @@ class Form(_ABC):
         else:
             self._widgets = [w for w in self._widgets if w.uid != uid]
 
+        self.reset_values()
+
         return self
 
     def remove_widgets(self):
         """Remove all widgets
         """
         self._widgets = []
+        self.reset_values()
 
         return self
 
@@ -822,15 +1034,29 @@ class Form(_ABC):
     def get_package_name(cls) -> str:
         """Get instance's package name.
         """
-        return '.'.join(cls.__module__.split('.')[:-1])
+        try:
+            return _PACKAGE_NAMES[cls]
+        except KeyError:
+            r = _PACKAGE_NAMES[cls] = '.'.join(cls.__module__.split('.')[:-1])
+            return r
 
     @classmethod
     def resolve_msg_id(cls, partly_msg_id: str) -> str:
+        key = (cls, partly_msg_id, _lang.get_current())
+        try:
+            return _MSG_IDS[key]
+        except KeyError:
+            pass
+
         # Searching for translation up in hierarchy
         for super_cls in cls.__mro__:
             if issubclass(super_cls, Form):
                 full_msg_id = super_cls.get_package_name() + '@' + partly_msg_id
                 if _lang.is_translation_defined(full_msg_id):
+                    # Translation found in class' own package cannot be overridden by packages registered later, so it
+                    # is memoized. Ones found in packages of parent classes are resolved on every call.
+                    if super_cls is cls:
+                        _MSG_IDS[key] = full_msg_id
                     return full_msg_id
 
         return cls.get_package_name() + '@' + partly_msg_id
@@ -0,0 +1,122 @@
+"""PytSite Form Plugin Lifecycle Hooks
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import re as _re
+from threading import Lock as _Lock
+from collections import OrderedDict as _OrderedDict
+from time import perf_counter as _perf_counter
+from typing import Callable as _Callable, Dict as _Dict, List as _List, Pattern as _Pattern, Tuple as _Tuple
+from pytsite import reg as _reg
+from . import _metrics
+
+HOOKS = ('setup_form', 'setup_widgets', 'render')
+
+_max_resolved = _reg.get('form.hooks_cache_size', 1024)
+
+
+def _handler_name(handler: _Callable) -> str:
+    """Get handler's name to label its metrics
+    """
+    return '{}.{}'.format(getattr(handler, '__module__', ''), getattr(handler, '__qualname__', repr(handler)))
+
+
+class Registry:
+    """Hook Listeners Registry
+
+    Listeners of exact form names are looked up directly. Listeners which form names contain wildcards are matched
+    against a form name once and the result is kept in the bounded LRU cache until a new listener is registered, so
+    forms with unique names, e.g. cached ones, cannot grow the registry.
+    """
+
+    def __init__(self, hook: str):
+        """Init
+        """
+        self._hook = hook
+        self._exact = {}  # type: _Dict[str, _List[_Tuple[int, int, _Callable, str]]]
+        self._exact_resolved = {}  # type: _Dict[str, _Tuple[_Tuple[_Callable, str], ...]]
+        self._wildcard = []  # type: _List[_Tuple[int, int, _Callable, str, _Pattern]]
+        self._resolved = _OrderedDict()  # type: _OrderedDict[str, _Tuple[_Tuple[_Callable, str], ...]]
+        self._lock = _Lock()
+
+    def listen(self, form_name: str, handler: _Callable, priority: int = 0):
+        """Add a listener
+
+        Form name may contain '*' wildcards.
+        """
+        label = 'hook.{}:{}'.format(self._hook, _handler_name(handler))
+
+        with self._lock:
+            # Listeners of the same priority are called in order they were registered
+            seq = sum(len(v) for v in self._exact.values()) + len(self._wildcard)
+
+            if '*' in form_name:
+                re = _re.compile(_re.escape(form_name).replace(r'\*', '.*?') + '$')
+                self._wildcard.append((priority, seq, handler, label, re))
+            else:
+                self._exact.setdefault(form_name, []).append((priority, seq, handler, label))
+                self._exact_resolved[form_name] = tuple((h, lb) for p, sq, h, lb in sorted(self._exact[form_name],
+                                                                                         key=lambda x: x[:2]))
+
+            self._resolved = _OrderedDict()
+
+    def listeners(self, form_name: str) -> _Tuple[_Tuple[_Callable, str], ...]:
+        """Get listeners of a form along with their metrics labels
+        """
+        if not self._wildcard:
+            return self._exact_resolved.get(form_name, ())
+
+        with self._lock:
+            r = self._resolved.get(form_name)
+            if r is not None:
+                self._resolved.move_to_end(form_name)
+                return r
+
+            matched = [x[:4] for x in self._wildcard if x[4].match(form_name)] + self._exact.get(form_name, [])
+            r = self._resolved[form_name] = tuple((h, lb) for p, sq, h, lb in sorted(matched, key=lambda x: x[:2]))
+            while len(self._resolved) > _max_resolved:
+                self._resolved.popitem(last=False)
+
+        return r
+
+    def dispatch(self, frm):
+        """Call listeners of a form
+        """
+        listeners = self.listeners(frm.name)
+        if not listeners:
+            return
+
+        if not _metrics.is_enabled():
+            for handler, label in listeners:
+                handler(frm=frm)
+            return
+
+        for handler, label in listeners:
+            start = _perf_counter()
+            try:
+                handler(frm=frm)
+            finally:
+                _metrics.record(label, _perf_counter() - start, frm.cid, frm.current_step)
+
+
+_registries = {h: Registry(h) for h in HOOKS}
+
+
+def listen(hook: str, form_name: str, handler: _Callable, priority: int = 0):
+    """Add a listener of a hook
+    """
+    _registries[hook].listen(form_name, handler, priority)
+
+
+def has_listeners(hook: str, form_name: str) -> bool:
+    """Check if a hook has listeners for a form
+    """
+    return bool(_registries[hook].listeners(form_name))
+
+
+def dispatch(hook: str, frm):
+    """Call listeners of a hook for a form
+    """
+    _registries[hook].dispatch(frm)
@@ -4,8 +4,27 @@ __author__ = 'Oleksandr Shepetko'
 __email__ = 'a@shepetko.com'
 __license__ = 'MIT'
 
-from pytsite import routing as _routing, formatters as _formatters
-from . import _error, _api, _form
+from contextlib import contextmanager as _contextmanager
+from pytsite import routing as _routing, formatters as _formatters, reg as _reg
+from . import _error, _api, _form, _metrics, _storage, _profiler
+
+_LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+_CACHE_OPS_BUDGETS = _reg.get('form.cache_ops_budgets', {})
+
+
+@_contextmanager
+def _instrument(endpoint: str):
+    """Measure endpoint's duration and cache operations, optionally profile it
+    """
+    with _metrics.measure('http.' + endpoint) as m, _profiler.profile('http.' + endpoint) as p:
+        with _storage.track_cache_ops(endpoint, _CACHE_OPS_BUDGETS.get(endpoint)) as ops:
+            try:
+                yield m
+            finally:
+                p.cid = m.cid
+                if _metrics.is_enabled():
+                    for k, v in ops.as_dict().items():
+                        _metrics.observe('http.{}.cache_{}'.format(endpoint, k), v, m.cid, m.step)
 
 
 def _setup_form_widgets(frm: _form.Form, step: int):
@@ -33,11 +52,17 @@ class PostGetWidgets(_routing.Controller):
 
         self.args.add_formatter('__form_step', _formatters.AboveZeroInt())
 
-    def exec(self) -> list:
-        frm = _api.dispense(self.request, self.args.pop('__form_uid'))
-        frm.name = self.args.pop('__form_name')
+    def exec(self) -> dict:
+        with _instrument('post_get_widgets') as m:
+            frm = _api.dispense(self.request, self.args.pop('__form_uid'))
+            frm.name = self.args.pop('__form_name')
+            m.cid, m.step = frm.cid, self.args.pop('__form_step')
+            _setup_form_widgets(frm, m.step)
 
-        return [str(w) for w in _setup_form_widgets(frm, self.args.pop('__form_step')).get_widgets()]
+            return {
+                'widgets': [str(w) for w in frm.get_widgets()],
+                'assets': frm.assets,
+            }
 
 
 class PostValidate(_routing.Controller):
@@ -50,29 +75,46 @@ class PostValidate(_routing.Controller):
         self.args.add_formatter('__form_step', _formatters.AboveZeroInt())
 
     def exec(self) -> dict:
-        try:
-            frm = _api.dispense(self.request, self.args.pop('__form_uid'))
-            frm.name = self.args.pop('__form_name')
-            _setup_form_widgets(frm, self.args.pop('__form_step')).fill(self.args).validate()
+        with _instrument('post_validate') as m:
+            try:
+                frm = _api.dispense(self.request, self.args.pop('__form_uid'))
+                frm.name = self.args.pop('__form_name')
+                m.cid, m.step = frm.cid, self.args.pop('__form_step')
+                _setup_form_widgets(frm, m.step).fill(self.args).validate()
 
-            return {'status': True}
+                return {'status': True}
 
-        except (_error.FormFillError, _error.FormValidationError) as e:
-            return {'status': False, 'messages': e.errors}
+            except (_error.FormFillError, _error.FormValidationError) as e:
+                return {'status': False, 'messages': e.errors}
 
 
 class PostSubmit(_routing.Controller):
     def exec(self):
-        frm = _api.dispense(self.request, self.args.pop('__form_uid'))
+        with _instrument('post_submit') as m:
+            frm = _api.dispense(self.request, self.args.pop('__form_uid'))
+            m.cid = frm.cid
+
+            # Setup widgets for all steps
+            for step in range(1, frm.steps + 1):
+                _setup_form_widgets(frm, step)
+
+            # Fill, validate and submit
+            r = frm.fill(self.args).validate().submit()
+
+            if r is None and not frm.redirect:
+                frm.redirect = self.request.referrer
 
-        # Setup widgets for all steps
-        for step in range(1, frm.steps + 1):
-            _setup_form_widgets(frm, step)
+            return {'__redirect': frm.redirect} if frm.redirect else r
 
-        # Fill, validate and submit
-        r = frm.fill(self.args).validate().submit()
 
-        if r is None and not frm.redirect:
-            frm.redirect = self.request.referrer
+class GetMetrics(_routing.Controller):
+    """Get metrics of the current process
+
+    Available only for local requests.
+    """
+
+    def exec(self) -> list:
+        if self.request.remote_addr not in _LOCAL_ADDRESSES:
+            raise self.forbidden()
 
-        return {'__redirect': frm.redirect} if frm.redirect else r
+        return _metrics.snapshot()
@@ -0,0 +1,251 @@
+"""PytSite Form Plugin Metrics
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import json as _json
+from collections import deque as _deque
+from functools import wraps as _wraps
+from os import getpid as _getpid, makedirs as _makedirs, listdir as _listdir, replace as _replace, remove as _remove, \
+    path as _path
+from threading import Lock as _Lock
+from time import perf_counter as _perf_counter, time as _time
+from typing import Callable as _Callable, Dict as _Dict, List as _List, Tuple as _Tuple
+from pytsite import reg as _reg, events as _events, threading as _threading, logger as _logger
+
+_enabled = _reg.get('form.metrics_enabled', True)
+_window = _reg.get('form.metrics_window', 1024)
+_export_interval = _reg.get('form.metrics_export_interval', 60)
+_histograms = {}  # type: _Dict[_Tuple[str, str, int], Histogram]
+_lock = _Lock()
+
+
+class Histogram:
+    """Histogram
+
+    Keeps total counters and a window of recent samples to calculate percentiles.
+    """
+
+    def __init__(self, window: int):
+        """Init
+        """
+        self._samples = _deque(maxlen=window)
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    def add(self, value: float):
+        """Add a sample
+        """
+        self._samples.append(value)
+        self._count += 1
+        self._total += value
+        if value > self._max:
+            self._max = value
+
+    def percentile(self, p: float) -> float:
+        """Calculate a percentile over recent samples
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+
+        return samples[min(int(len(samples) * p / 100), len(samples) - 1)]
+
+    def as_dict(self) -> dict:
+        """Get histogram's data
+        """
+        return {
+            'count': self._count,
+            'total': self._total,
+            'mean': self._total / self._count if self._count else 0.0,
+            'max': self._max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class Measure:
+    """Measure Context Manager
+
+    Labels can be changed until the measure is finished.
+    """
+
+    def __init__(self, phase: str, cid: str = '', step: int = 0):
+        """Init
+        """
+        self.phase = phase
+        self.cid = cid
+        self.step = step
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = _perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if _enabled:
+            record(self.phase, _perf_counter() - self._start, self.cid, self.step)
+
+
+def is_enabled() -> bool:
+    """Check if metrics are enabled
+    """
+    return _enabled
+
+
+def observe(name: str, value: float, cid: str = '', step: int = 0):
+    """Add a value to the histogram
+    """
+    key = (name, cid, step)
+
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = Histogram(_window)
+        h.add(value)
+
+
+def record(phase: str, duration: float, cid: str = '', step: int = 0):
+    """Record a duration in seconds
+    """
+    observe(phase, duration * 1000, cid, step)
+
+
+def measure(phase: str, cid: str = '', step: int = 0) -> Measure:
+    """Measure duration of a code block
+    """
+    return Measure(phase, cid, step)
+
+
+def timed(phase: str):
+    """Decorator to measure duration of form's methods
+    """
+
+    def decorator(method: _Callable):
+        @_wraps(method)
+        def wrapper(frm, *args, **kwargs):
+            if not _enabled:
+                return method(frm, *args, **kwargs)
+
+            start = _perf_counter()
+            try:
+                return method(frm, *args, **kwargs)
+            finally:
+                record(phase, _perf_counter() - start, frm.cid, frm.current_step)
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> _List[dict]:
+    """Get current values of all histograms
+
+    Durations are in milliseconds, values of other histograms are reported as is.
+    """
+    with _lock:
+        items = list(_histograms.items())
+
+    r = []
+    for (phase, cid, step), h in sorted(items, key=lambda i: i[0]):
+        d = {'phase': phase, 'cid': cid, 'step': step}
+        d.update(h.as_dict())
+        r.append(d)
+
+    return r
+
+
+def reset():
+    """Reset all histograms
+    """
+    with _lock:
+        _histograms.clear()
+
+
+def get_dump_path() -> str:
+    """Get path to the directory with metrics dumps of processes
+    """
+    return _reg.get('form.metrics_path', _path.join(_reg.get('paths.storage'), 'form_metrics'))
+
+
+def dump():
+    """Dump current process's metrics into the file
+    """
+    dump_path = get_dump_path()
+    _makedirs(dump_path, 0o755, True)
+
+    f_path = _path.join(dump_path, '{}.json'.format(_getpid()))
+    with open(f_path + '.tmp', 'wt') as f:
+        _json.dump(snapshot(), f)
+    _replace(f_path + '.tmp', f_path)
+
+    prune()
+
+
+def prune():
+    """Remove dumps of processes which have not exported metrics during last three export intervals
+    """
+    dump_path = get_dump_path()
+    if not _path.isdir(dump_path):
+        return
+
+    expired = _time() - _export_interval * 3
+    for f_name in _listdir(dump_path):
+        f_path = _path.join(dump_path, f_name)
+        try:
+            if _path.getmtime(f_path) < expired:
+                _remove(f_path)
+        except FileNotFoundError:
+            pass
+
+
+def load_dumps() -> _Dict[int, _List[dict]]:
+    """Load metrics dumps of running processes
+    """
+    r = {}
+
+    prune()
+
+    dump_path = get_dump_path()
+    if not _path.isdir(dump_path):
+        return r
+
+    for f_name in _listdir(dump_path):
+        if f_name.endswith('.json'):
+            try:
+                with open(_path.join(dump_path, f_name), 'rt') as f:
+                    r[int(f_name[:-5])] = _json.load(f)
+            except FileNotFoundError:
+                pass
+
+    return r
+
+
+def export():
+    """Pass metrics to exporters and dump them
+    """
+    data = snapshot()
+    if not data:
+        return
+
+    _events.fire('form@export_metrics', metrics=data)
+    dump()
+
+
+def start_exporter(interval: float):
+    """Run metrics export periodically
+    """
+
+    def worker():
+        try:
+            export()
+        except Exception as e:
+            _logger.error(e)
+
+        _threading.run_in_thread(worker, interval)
+
+    _threading.run_in_thread(worker, interval)
@@ -0,0 +1,93 @@
+"""PytSite Form Plugin Sampling Profiler
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import re as _re
+from cProfile import Profile as _Profile
+from os import getpid as _getpid, makedirs as _makedirs, listdir as _listdir, remove as _remove, path as _path
+from random import random as _random
+from threading import local as _local
+from time import time as _time
+from pytsite import reg as _reg, logger as _logger
+
+_rate = float(_reg.get('form.profiler_rate', 0.0))
+_cids = _reg.get('form.profiler_cids', [])
+_max_files = _reg.get('form.profiler_max_files', 100)
+_state = _local()
+_F_NAME_SUB_RE = _re.compile('[^a-zA-Z0-9_.\-]+')
+
+
+def get_path() -> str:
+    """Get path to the directory with profiles
+    """
+    return _reg.get('form.profiler_path', _path.join(_reg.get('paths.storage'), 'form_profiles'))
+
+
+class Profile:
+    """Profile Context Manager
+
+    Profiles the code block for the configured fraction of calls and writes pstats file. Form's CID can be set until
+    the block is finished; profiles of forms which are not listed in `form.profiler_cids` are discarded.
+    """
+
+    def __init__(self, name: str, cid: str = ''):
+        """Init
+        """
+        self.name = name
+        self.cid = cid
+        self._profile = None  # type: _Profile
+
+    def __enter__(self):
+        # Profiles cannot be nested
+        if not _rate or getattr(_state, 'active', False) or _random() >= _rate:
+            return self
+
+        # Form's CID known up front is checked before profiling, so forms which are not listed are not slowed down
+        if _cids and self.cid and self.cid not in _cids:
+            return self
+
+        _state.active = True
+        self._profile = _Profile()
+        self._profile.enable()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self._profile:
+            return
+
+        self._profile.disable()
+        _state.active = False
+
+        if _cids and self.cid not in _cids:
+            return
+
+        try:
+            _write(self._profile, self.name, self.cid)
+        except OSError as e:
+            _logger.error(e)
+
+
+def profile(name: str, cid: str = '') -> Profile:
+    """Profile a code block
+    """
+    return Profile(name, cid)
+
+
+def _write(p: _Profile, name: str, cid: str):
+    """Write a profile and remove the oldest ones
+    """
+    profiles_path = get_path()
+    _makedirs(profiles_path, 0o755, True)
+
+    f_name = _F_NAME_SUB_RE.sub('_', '{:.6f}-{}-{}-{}'.format(_time(), name, cid, _getpid())) + '.prof'
+    p.dump_stats(_path.join(profiles_path, f_name))
+
+    f_names = sorted(f for f in _listdir(profiles_path) if f.endswith('.prof'))
+    for f_name in f_names[:max(len(f_names) - _max_files, 0)]:
+        try:
+            _remove(_path.join(profiles_path, f_name))
+        except FileNotFoundError:
+            pass
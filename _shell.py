@@ -0,0 +1,76 @@
+"""PytSite Form Plugin Rendered Shells Cache
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+from collections import OrderedDict as _OrderedDict
+from threading import Lock as _Lock
+from typing import Callable as _Callable, Optional as _Optional
+from pytsite import reg as _reg
+
+# Form's fields which differ from instance to instance
+_INSTANCE_FIELDS = ('uid', 'name', 'action', 'location', 'referer', 'redirect')
+
+# Form's attributes which are used by the form's template
+_STATIC_ATTRS = ('method', 'enctype', 'css', 'get_widgets_ep', 'validation_ep', 'steps', 'update_location_hash',
+                 'title', 'hide_title', 'title_css', 'area_hidden_css', 'area_header_css', 'area_body_css',
+                 'area_footer_css', 'messages_css')
+
+_TOKEN_FMT = '__pytsite_form_shell_{}__'
+
+_shells = _OrderedDict()
+_lock = _Lock()
+_max_size = _reg.get('form.shell_cache_size', 512)
+
+
+class _Proxy:
+    """Form Proxy
+
+    Returns placeholder tokens instead of values of instance fields.
+    """
+
+    def __init__(self, frm):
+        self._form = frm
+
+    def __getattr__(self, item: str):
+        if item in _INSTANCE_FIELDS:
+            return _TOKEN_FMT.format(item)
+
+        return getattr(self._form, item)
+
+
+def build_key(frm, language: str) -> tuple:
+    """Build shell's key
+    """
+    return (frm.tpl, frm.cid, language, tuple(frm.assets)) + tuple(frm.attr(k) for k in _STATIC_ATTRS)
+
+
+def render(frm, key: tuple, render_tpl: _Callable[[object], str]) -> str:
+    """Render a form using cached shell
+    """
+    with _lock:
+        shell = _shells.get(key)  # type: _Optional[str]
+        if shell is not None:
+            _shells.move_to_end(key)
+
+    if shell is None:
+        shell = render_tpl(_Proxy(frm))
+
+        with _lock:
+            _shells[key] = shell
+            while len(_shells) > _max_size:
+                _shells.popitem(last=False)
+
+    # Values are substituted the same way the template engine outputs them, which does not autoescape
+    for field in _INSTANCE_FIELDS:
+        shell = shell.replace(_TOKEN_FMT.format(field), str(getattr(frm, field)))
+
+    return shell
+
+
+def clear():
+    """Clear shells cache
+    """
+    with _lock:
+        _shells.clear()
@@ -0,0 +1,791 @@
+"""PytSite Form Plugin State Storage
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import pickle as _pickle
+from sys import getsizeof as _getsizeof
+from os import urandom as _urandom, makedirs as _makedirs, replace as _replace, utime as _utime, \
+    listdir as _listdir, remove as _remove, path as _path
+from hashlib import sha256 as _sha256
+from mmap import mmap as _mmap, ACCESS_READ as _ACCESS_READ
+from shutil import rmtree as _rmtree
+from time import time as _time
+from collections import OrderedDict as _OrderedDict
+from threading import Lock as _Lock, RLock as _RLock, local as _local
+from typing import Any as _Any, Dict as _Dict, List as _List, Mapping as _Mapping, Optional as _Optional, \
+    Tuple as _Tuple
+from pytsite import cache as _cache, reg as _reg, logger as _logger
+from . import _codec, _error
+
+_VERSION_KEY = '__v'
+_CODEC_MAGIC = b'\x00pytsite.form:'
+_SPILL_MAGIC = b'\x00pytsite.form.spill:'
+
+_pools = {}  # type: _Dict[str, Pool]
+_lru = None  # type: _Optional[LRU]
+_trackers = _local()
+
+
+class Pool:
+    """Form State Storage Pool
+
+    Delegates all operations to the wrapped pool. Subclasses add behaviour on top of it.
+    """
+
+    def __init__(self, inner):
+        """Init
+        """
+        self._inner = inner
+
+    @property
+    def uid(self) -> str:
+        """Get UID of the pool
+        """
+        return self._inner.uid
+
+    def has(self, key: str) -> bool:
+        """Check whether an item exists in the pool
+        """
+        return self._inner.has(key)
+
+    def get(self, key: str) -> _Any:
+        """Get an item from the pool
+        """
+        return self._inner.get(key)
+
+    def put(self, key: str, value: _Any, ttl: int = None):
+        """Put an item into the pool
+        """
+        return self._inner.put(key, value, ttl)
+
+    def get_hash(self, key: str, hash_keys: _List[str] = None) -> _Mapping:
+        """Get hash
+        """
+        return self._inner.get_hash(key, hash_keys)
+
+    def put_hash(self, key: str, value: _Mapping, ttl: int = None):
+        """Put a hash into the pool
+        """
+        return self._inner.put_hash(key, value, ttl)
+
+    def get_hash_item(self, key: str, item_key: str, default=None) -> _Any:
+        """Get a value from a hash
+        """
+        return self._inner.get_hash_item(key, item_key, default)
+
+    def put_hash_item(self, key: str, item_key: str, value: _Any):
+        """Put a value into a hash
+        """
+        return self._inner.put_hash_item(key, item_key, value)
+
+    def put_hash_items(self, key: str, items: _Mapping):
+        """Put several values into a hash
+        """
+        for item_key, value in items.items():
+            self.put_hash_item(key, item_key, value)
+
+    def rm(self, key: str):
+        """Remove an item from the pool
+        """
+        return self._inner.rm(key)
+
+
+def _sizeof(value: _Any) -> int:
+    """Estimate size of a value in bytes
+    """
+    if isinstance(value, (bytes, str)):
+        return len(value)
+
+    if isinstance(value, dict):
+        return sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return sum(_sizeof(v) for v in value)
+
+    return _getsizeof(value)
+
+
+class CacheOps:
+    """Cache Operations Tracker
+
+    Counts cache operations performed by the current thread while the tracker is active.
+    """
+
+    def __init__(self, name: str = '', max_ops: int = None, strict: bool = False):
+        """Init
+        """
+        self.name = name
+        self.max_ops = max_ops
+        self.strict = strict
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @property
+    def ops(self) -> int:
+        """Get total number of operations
+        """
+        return self.reads + self.writes
+
+    def as_dict(self) -> dict:
+        """Get tracked data
+        """
+        return {
+            'reads': self.reads,
+            'writes': self.writes,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+    def __enter__(self):
+        if not hasattr(_trackers, 'stack'):
+            _trackers.stack = []
+
+        _trackers.stack.append(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _trackers.stack.remove(self)
+
+        if self.max_ops is None or self.ops <= self.max_ops or exc_type:
+            return
+
+        e = _error.CacheOpsBudgetExceeded(self.name, self.ops, self.max_ops)
+        if self.strict:
+            raise e
+
+        _logger.warn(e)
+
+
+class CountingPool(Pool):
+    """Counting Pool
+
+    Reports operations performed on the wrapped pool to active trackers.
+    """
+
+    @staticmethod
+    def _track(reads: int = 0, writes: int = 0, read_value: _Any = None, written_value: _Any = None):
+        """Report an operation to active trackers
+        """
+        stack = getattr(_trackers, 'stack', None)
+        if not stack:
+            return
+
+        bytes_read = _sizeof(read_value) if read_value is not None else 0
+        bytes_written = _sizeof(written_value) if written_value is not None else 0
+        for tracker in stack:
+            tracker.reads += reads
+            tracker.writes += writes
+            tracker.bytes_read += bytes_read
+            tracker.bytes_written += bytes_written
+
+    def has(self, key: str) -> bool:
+        """Check whether an item exists in the pool
+        """
+        self._track(reads=1)
+
+        return self._inner.has(key)
+
+    def get(self, key: str) -> _Any:
+        """Get an item from the pool
+        """
+        self._track(reads=1)
+        r = self._inner.get(key)
+        self._track(read_value=r)
+
+        return r
+
+    def put(self, key: str, value: _Any, ttl: int = None):
+        """Put an item into the pool
+        """
+        self._track(writes=1, written_value=value)
+
+        return self._inner.put(key, value, ttl)
+
+    def get_hash(self, key: str, hash_keys: _List[str] = None) -> _Mapping:
+        """Get hash
+        """
+        self._track(reads=1)
+        r = self._inner.get_hash(key, hash_keys)
+        self._track(read_value=r)
+
+        return r
+
+    def put_hash(self, key: str, value: _Mapping, ttl: int = None):
+        """Put a hash into the pool
+        """
+        self._track(writes=1, written_value=value)
+
+        return self._inner.put_hash(key, value, ttl)
+
+    def get_hash_item(self, key: str, item_key: str, default=None) -> _Any:
+        """Get a value from a hash
+        """
+        self._track(reads=1)
+        r = self._inner.get_hash_item(key, item_key, default)
+        self._track(read_value=r)
+
+        return r
+
+    def put_hash_item(self, key: str, item_key: str, value: _Any):
+        """Put a value into a hash
+        """
+        self._track(writes=1, written_value=value)
+
+        return self._inner.put_hash_item(key, item_key, value)
+
+    def rm(self, key: str):
+        """Remove an item from the pool
+        """
+        self._track(writes=1)
+
+        return self._inner.rm(key)
+
+
+class LRU:
+    """In-process LRU Store
+
+    Entries are kept pickled, so callers always get their own copies and the size of each entry is known.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        """Init
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = _OrderedDict()  # type: _OrderedDict[_Tuple[str, str], _Tuple[_Optional[str], bytes]]
+        self._bytes = 0
+        self._lock = _RLock()
+
+    @property
+    def size(self) -> int:
+        """Get number of entries
+        """
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        """Get total size of entries in bytes
+        """
+        return self._bytes
+
+    def get(self, pool: str, key: str) -> _Optional[_Tuple[_Optional[str], _Any]]:
+        """Get version and value of an entry
+        """
+        with self._lock:
+            entry = self._entries.get((pool, key))
+            if entry is None:
+                return None
+
+            self._entries.move_to_end((pool, key))
+
+        return entry[0], _pickle.loads(entry[1])
+
+    def put(self, pool: str, key: str, value: _Any, version: str = None):
+        """Put an entry
+        """
+        blob = _pickle.dumps(value, _pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self.rm(pool, key)
+
+            # Entry which alone exceeds the limit is not worth to be kept
+            if len(blob) > self._max_bytes:
+                return
+
+            self._entries[(pool, key)] = (version, blob)
+            self._bytes += len(blob)
+
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._bytes -= len(self._entries.popitem(last=False)[1][1])
+
+    def rm(self, pool: str, key: str):
+        """Remove an entry
+        """
+        with self._lock:
+            entry = self._entries.pop((pool, key), None)
+            if entry is not None:
+                self._bytes -= len(entry[1])
+
+    def clear(self):
+        """Remove all entries
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class LRUPool(Pool):
+    """Two-level Pool
+
+    Keeps recently used items in the in-process LRU store in front of the shared cache. Hashes are stamped with a
+    version which changes on every write, so an entry modified by another process is detected as stale.
+
+    With verification on, which is the default, every read of a local entry still costs one read of the shared cache,
+    for the version or existence of the item, and every batch of hash items costs one more write, for the version. The
+    number of shared cache operations does not drop then, only transferring and decoding of whole hashes is saved on
+    drivers which read single hash items. Shared cache reads drop only with verification off: local entries are
+    served until evicted, so changes made by other processes, including removal of expired or submitted forms, are
+    not seen. It is safe only if requests of a form are always routed to the same process.
+
+    Writes never read the shared cache: they update the local copy, which was verified by the read preceding them in
+    the same request. Hash items and the new version are separate writes, so when two processes write items of the
+    same hash concurrently, the one which writes the version last keeps a local copy without the other's item until
+    the hash is written again or evicted. Forms' hashes are written by requests of a single user,
+    so such writes happen only if the same form is submitted concurrently.
+    """
+
+    def __init__(self, inner, lru: LRU, verify: bool = True):
+        """Init
+        """
+        super().__init__(inner)
+
+        self._lru = lru
+        self._verify = verify
+
+    def _local(self, key: str) -> _Optional[_Tuple[_Optional[str], _Any]]:
+        """Get fresh local entry
+        """
+        entry = self._lru.get(self.uid, key)
+        if entry is None or not self._verify:
+            return entry
+
+        # Plain values are never modified in place, so it is enough to check their existence
+        if entry[0] is None:
+            return entry if self._inner.has(key) else None
+
+        if self._inner.get_hash_item(key, _VERSION_KEY) != entry[0]:
+            self._lru.rm(self.uid, key)
+            return None
+
+        return entry
+
+    def has(self, key: str) -> bool:
+        """Check whether an item exists in the pool
+        """
+        if self._lru.get(self.uid, key) is not None and not self._verify:
+            return True
+
+        return self._inner.has(key)
+
+    def get(self, key: str) -> _Any:
+        """Get an item from the pool
+        """
+        entry = self._local(key)
+        if entry is not None:
+            return entry[1]
+
+        value = self._inner.get(key)
+        self._lru.put(self.uid, key, value)
+
+        return value
+
+    def put(self, key: str, value: _Any, ttl: int = None):
+        """Put an item into the pool
+        """
+        r = self._inner.put(key, value, ttl)
+        self._lru.put(self.uid, key, value)
+
+        return r
+
+    def get_hash(self, key: str, hash_keys: _List[str] = None) -> _Mapping:
+        """Get hash
+        """
+        entry = self._local(key)
+        if entry is None:
+            value = dict(self._inner.get_hash(key))
+            version = value.pop(_VERSION_KEY, None)
+            if version is not None:
+                self._lru.put(self.uid, key, value, version)
+        else:
+            value = entry[1]
+
+        return {k: v for k, v in value.items() if k in hash_keys} if hash_keys else value
+
+    def put_hash(self, key: str, value: _Mapping, ttl: int = None):
+        """Put a hash into the pool
+        """
+        version = _urandom(8).hex()
+        r = self._inner.put_hash(key, dict(value, **{_VERSION_KEY: version}), ttl)
+        self._lru.put(self.uid, key, dict(value), version)
+
+        return r
+
+    def get_hash_item(self, key: str, item_key: str, default=None) -> _Any:
+        """Get a value from a hash
+        """
+        entry = self._local(key)
+        if entry is None:
+            return self._inner.get_hash_item(key, item_key, default)
+
+        return entry[1].get(item_key, default)
+
+    def put_hash_item(self, key: str, item_key: str, value: _Any):
+        """Put a value into a hash
+        """
+        self.put_hash_items(key, {item_key: value})
+
+        return value
+
+    def put_hash_items(self, key: str, items: _Mapping):
+        """Put several values into a hash
+        """
+        if not items:
+            return
+
+        for item_key, value in items.items():
+            self._inner.put_hash_item(key, item_key, value)
+
+        # One version write per batch of items
+        version = _urandom(8).hex()
+        self._inner.put_hash_item(key, _VERSION_KEY, version)
+
+        # Write-through to the local copy, which is not verified here to avoid reading the shared cache
+        entry = self._lru.get(self.uid, key)
+        if entry is not None and entry[0] is not None:
+            entry[1].update(items)
+            self._lru.put(self.uid, key, entry[1], version)
+
+    def rm(self, key: str):
+        """Remove an item from the pool
+        """
+        self._lru.rm(self.uid, key)
+
+        return self._inner.rm(key)
+
+
+class CodecPool(Pool):
+    """Encoding Pool
+
+    Values which serialized size reaches the threshold are stored in the cache pickled and encoded by the codec. Smaller
+    values are passed to the cache untouched.
+    """
+
+    def __init__(self, inner, codec: _codec.Codec, threshold: int = 1024):
+        """Init
+        """
+        super().__init__(inner)
+
+        self._codec = codec
+        self._threshold = threshold
+        self._stats = {'values': 0, 'encoded': 0, 'raw_bytes': 0, 'stored_bytes': 0}
+        self._stats_lock = _Lock()
+
+    @property
+    def stats(self) -> dict:
+        """Get size statistics
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _encode(self, value: _Any) -> _Any:
+        """Encode a value
+        """
+        raw = _pickle.dumps(value, _pickle.HIGHEST_PROTOCOL)
+
+        if len(raw) >= self._threshold:
+            stored = _CODEC_MAGIC + self._codec.name.encode() + b':' + self._codec.encode(raw)
+        else:
+            stored = None
+
+        with self._stats_lock:
+            self._stats['values'] += 1
+            self._stats['raw_bytes'] += len(raw)
+            self._stats['stored_bytes'] += len(stored) if stored is not None else len(raw)
+            if stored is not None:
+                self._stats['encoded'] += 1
+
+        return value if stored is None else stored
+
+    @staticmethod
+    def _decode(value: _Any) -> _Any:
+        """Decode a value
+        """
+        if not (isinstance(value, bytes) and value.startswith(_CODEC_MAGIC)):
+            return value
+
+        name, data = value[len(_CODEC_MAGIC):].split(b':', 1)
+
+        return _pickle.loads(_codec.get_codec(name.decode()).decode(data))
+
+    def get(self, key: str) -> _Any:
+        """Get an item from the pool
+        """
+        return self._decode(self._inner.get(key))
+
+    def put(self, key: str, value: _Any, ttl: int = None):
+        """Put an item into the pool
+        """
+        return self._inner.put(key, self._encode(value), ttl)
+
+    def get_hash(self, key: str, hash_keys: _List[str] = None) -> _Mapping:
+        """Get hash
+        """
+        return {k: self._decode(v) for k, v in self._inner.get_hash(key, hash_keys).items()}
+
+    def put_hash(self, key: str, value: _Mapping, ttl: int = None):
+        """Put a hash into the pool
+        """
+        return self._inner.put_hash(key, {k: self._encode(v) for k, v in value.items()}, ttl)
+
+    def get_hash_item(self, key: str, item_key: str, default=None) -> _Any:
+        """Get a value from a hash
+        """
+        return self._decode(self._inner.get_hash_item(key, item_key, default))
+
+    def put_hash_item(self, key: str, item_key: str, value: _Any):
+        """Put a value into a hash
+        """
+        return self._inner.put_hash_item(key, item_key, self._encode(value))
+
+
+class SpillPool(Pool):
+    """Spilling Pool
+
+    Values which size reaches the threshold are stored in the content-addressed file store, the cache keeps only
+    references to them. Files of each key are kept in a separate directory, which is removed along with the key. Names
+    of files are prefixed with the hash of the item's key, so the file of a superseded value is removed as soon as the
+    item is overwritten.
+    """
+
+    def __init__(self, inner, path: str, threshold: int):
+        """Init
+        """
+        super().__init__(inner)
+
+        self._path = path
+        self._threshold = max(threshold, 1)
+
+    def _key_dir(self, key: str) -> str:
+        """Get path to the directory of key's files
+        """
+        return _path.join(self._path, self.uid, _sha256(key.encode()).hexdigest())
+
+    @staticmethod
+    def _item_prefix(item_key: str) -> str:
+        """Get prefix of names of item's files
+        """
+        return _sha256(item_key.encode()).hexdigest()[:16] + '.'
+
+    def _spill(self, key: str, value: _Any, item_key: str = '') -> _Tuple[_Any, _Optional[str]]:
+        """Move a value to the file store if it is large enough
+
+        Returns the value to put into the cache and the name of the value's file.
+        """
+        if isinstance(value, bytes):
+            kind, data = b'b', value
+        else:
+            kind, data = b'p', _pickle.dumps(value, _pickle.HIGHEST_PROTOCOL)
+
+        if len(data) < self._threshold:
+            return value, None
+
+        key_dir = self._key_dir(key)
+        f_name = self._item_prefix(item_key) + _sha256(data).hexdigest()
+        f_path = _path.join(key_dir, f_name)
+
+        if _path.exists(f_path):
+            _utime(key_dir)
+        else:
+            _makedirs(key_dir, 0o755, True)
+            tmp_path = '{}.{}.tmp'.format(f_path, _urandom(4).hex())
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            _replace(tmp_path, f_path)
+
+        return _SPILL_MAGIC + kind + f_name.encode(), f_name
+
+    def _discard(self, key: str, prefix: str, keep: _Tuple[str, ...] = ()):
+        """Remove key's files which names start with the prefix, except ones to keep
+        """
+        key_dir = self._key_dir(key)
+        if not _path.isdir(key_dir):
+            return
+
+        for f_name in _listdir(key_dir):
+            if f_name.startswith(prefix) and f_name not in keep and not f_name.endswith('.tmp'):
+                try:
+                    _remove(_path.join(key_dir, f_name))
+                except FileNotFoundError:
+                    pass
+
+    def _restore(self, key: str, value: _Any) -> _Any:
+        """Load a value from the file store if it is a reference
+
+        Raises FileNotFoundError if referenced file has been already removed.
+        """
+        if not (isinstance(value, bytes) and value.startswith(_SPILL_MAGIC)):
+            return value
+
+        ref = value[len(_SPILL_MAGIC):]
+        with open(_path.join(self._key_dir(key), ref[1:].decode()), 'rb') as f:
+            with _mmap(f.fileno(), 0, access=_ACCESS_READ) as m:
+                return _pickle.loads(m) if ref[:1] == b'p' else m[:]
+
+    def _lost(self, key: str, item_key: str, e: FileNotFoundError):
+        """Report a value which file is missing
+        """
+        _logger.error("Spilled value of item '{}' of key '{}' in pool '{}' is lost: {}".
+                      format(item_key, key, self.uid, e))
+
+    def get(self, key: str) -> _Any:
+        """Get an item from the pool
+        """
+        try:
+            return self._restore(key, self._inner.get(key))
+        except FileNotFoundError:
+            raise _cache.error.KeyNotExist(self.uid, key)
+
+    def put(self, key: str, value: _Any, ttl: int = None):
+        """Put an item into the pool
+        """
+        value, f_name = self._spill(key, value)
+        r = self._inner.put(key, value, ttl)
+        self._discard(key, self._item_prefix(''), (f_name,))
+
+        return r
+
+    def get_hash(self, key: str, hash_keys: _List[str] = None) -> _Mapping:
+        """Get hash
+
+        Items which files are missing, e.g. removed by cleanup() or stored on another host, are reported and skipped.
+        """
+        r = {}
+
+        for k, v in self._inner.get_hash(key, hash_keys).items():
+            try:
+                r[k] = self._restore(key, v)
+            except FileNotFoundError as e:
+                self._lost(key, k, e)
+
+        return r
+
+    def put_hash(self, key: str, value: _Mapping, ttl: int = None):
+        """Put a hash into the pool
+        """
+        spilled = {k: self._spill(key, v, k) for k, v in value.items()}
+        r = self._inner.put_hash(key, {k: v[0] for k, v in spilled.items()}, ttl)
+        self._discard(key, '', tuple(v[1] for v in spilled.values() if v[1]))
+
+        return r
+
+    def get_hash_item(self, key: str, item_key: str, default=None) -> _Any:
+        """Get a value from a hash
+        """
+        try:
+            return self._restore(key, self._inner.get_hash_item(key, item_key, default))
+        except FileNotFoundError as e:
+            self._lost(key, item_key, e)
+            return default
+
+    def put_hash_item(self, key: str, item_key: str, value: _Any):
+        """Put a value into a hash
+        """
+        value, f_name = self._spill(key, value, item_key)
+        r = self._inner.put_hash_item(key, item_key, value)
+        self._discard(key, self._item_prefix(item_key), (f_name,))
+
+        return r
+
+    def rm(self, key: str):
+        """Remove an item from the pool
+        """
+        _rmtree(self._key_dir(key), True)
+
+        return self._inner.rm(key)
+
+
+def _get_spill_path() -> str:
+    """Get path to the spilled values file store
+    """
+    return _reg.get('form.cache_spill_path', _path.join(_reg.get('paths.storage'), 'form'))
+
+
+def get_lru() -> _Optional[LRU]:
+    """Get in-process LRU store, if it is enabled
+    """
+    global _lru
+
+    max_entries = _reg.get('form.cache_lru_entries', 0)
+    if not max_entries:
+        return None
+
+    if _lru is None:
+        _lru = LRU(max_entries, _reg.get('form.cache_lru_bytes', 16777216))  # 16 MB
+
+    return _lru
+
+
+def get_pool(uid: str) -> Pool:
+    """Get form state storage pool
+    """
+    try:
+        return _pools[uid]
+    except KeyError:
+        pass
+
+    pool = CountingPool(_cache.get_pool(uid))
+
+    spill_threshold = _reg.get('form.cache_spill_threshold', 0)
+    if spill_threshold:
+        pool = SpillPool(pool, _get_spill_path(), spill_threshold)
+
+    codec = _reg.get('form.cache_codec')
+    if codec:
+        pool = CodecPool(pool, _codec.get_codec(codec), _reg.get('form.cache_codec_threshold', 1024))
+
+    lru = get_lru()
+    if lru:
+        pool = LRUPool(pool, lru, _reg.get('form.cache_lru_verify', True))
+
+    _pools[uid] = pool
+
+    return pool
+
+
+def get_pools() -> _List[Pool]:
+    """Get all form state storage pools created so far
+    """
+    return list(_pools.values())
+
+
+def cleanup():
+    """Remove spilled files of keys which were not updated during cache TTL
+    """
+    spill_path = _get_spill_path()
+    if not _path.isdir(spill_path):
+        return
+
+    expired = _time() - _reg.get('form.cache_ttl', 604800)
+    for pool_d_name in _listdir(spill_path):
+        pool_dir = _path.join(spill_path, pool_d_name)
+        for key_d_name in _listdir(pool_dir):
+            key_dir = _path.join(pool_dir, key_d_name)
+            if _path.getmtime(key_dir) < expired:
+                _rmtree(key_dir, True)
+
+
+def track_cache_ops(name: str = '', max_ops: int = None, strict: bool = False) -> CacheOps:
+    """Track cache operations performed by the current thread
+
+    If `max_ops` is exceeded, the warning is logged or, in `strict` mode, `CacheOpsBudgetExceeded` is raised.
+    """
+    return CacheOps(name, max_ops, strict)
+
+
+def get_codec_stats() -> _Dict[str, dict]:
+    """Get size statistics of encoding pools
+    """
+    r = {}
+
+    for pool in get_pools():
+        while isinstance(pool, Pool):
+            if isinstance(pool, CodecPool):
+                r[pool.uid] = pool.stats
+            pool = pool._inner
+
+    return r
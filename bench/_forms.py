@@ -0,0 +1,61 @@
+"""PytSite Form Plugin Benchmarks Forms
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+from plugins import form as _form, widget as _widget
+
+
+class Simple(_form.Form):
+    """Form with a few widgets
+    """
+
+    def _on_setup_widgets(self):
+        for i in range(5):
+            self.add_widget(_widget.Input(uid='field_{}'.format(i), required=True))
+
+
+class Wide(_form.Form):
+    """Form with many widgets placed directly on it
+    """
+    widgets_num = 500
+
+    def _on_setup_widgets(self):
+        for i in range(self.widgets_num):
+            self.add_widget(_widget.Input(uid='field_{}'.format(i), required=True))
+
+
+class Deep(_form.Form):
+    """Form with widgets nested into a chain of containers
+    """
+    depth = 50
+    leaves = 5
+
+    def _on_setup_widgets(self):
+        parent = self.add_widget(_widget.Container(uid='container_0'))
+        for d in range(1, self.depth):
+            for i in range(self.leaves):
+                parent.append_child(_widget.Input(uid='field_{}_{}'.format(d, i), required=True))
+            parent = parent.append_child(_widget.Container(uid='container_{}'.format(d)))
+
+
+class MultiStep(_form.Form):
+    """Form with several steps
+    """
+    step_widgets_num = 20
+
+    def _on_setup_form(self):
+        self.steps = 3
+
+    def _on_setup_widgets(self):
+        for i in range(self.step_widgets_num):
+            self.add_widget(_widget.Input(uid='field_{}_{}'.format(self.current_step, i), required=True,
+                                          form_step=self.current_step,
+                                          assets=['bench@css/common.css', 'bench@js/{}.js'.format(i % 4)]))
+
+
+def values(frm: _form.Form, value: str = 'value') -> dict:
+    """Build values for all form's input widgets
+    """
+    return {w.uid: value for w in frm.get_widgets() if isinstance(w, _widget.Input)}
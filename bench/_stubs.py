@@ -0,0 +1,437 @@
+"""PytSite Form Plugin Benchmarks Stand-ins
+
+Minimal in-memory replacements of PytSite core modules and plugins which the form plugin depends on. They make it
+possible to load the plugin outside of a PytSite application.
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import re as _re
+import sys as _sys
+import types as _types
+import random as _random
+import string as _string
+import importlib.util as _importlib_util
+from os import path as _path
+from threading import Lock as _Lock
+
+PLUGIN_PATH = _path.abspath(_path.join(_path.dirname(__file__), _path.pardir))
+
+
+def _module(name: str, **attrs) -> _types.ModuleType:
+    m = _types.ModuleType(name)
+    m.__dict__.update(attrs)
+    _sys.modules[name] = m
+
+    return m
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# pytsite.reg
+# ---------------------------------------------------------------------------------------------------------------------
+
+REG = {
+    'paths.storage': '/tmp/pytsite-form-bench',
+    'form.metrics_enabled': False,
+}
+
+
+def _reg_get(key: str, default=None):
+    return REG.get(key, default)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# pytsite.cache
+# ---------------------------------------------------------------------------------------------------------------------
+
+class KeyNotExist(Exception):
+    def __init__(self, pool_uid: str, key: str):
+        super().__init__("Pool '{}' does not contain key '{}'".format(pool_uid, key))
+
+
+class MemoryPool:
+    """In-memory Cache Pool
+
+    Values are deep-copied on every operation, like a remote cache returns new objects on every read.
+    """
+
+    def __init__(self, uid: str):
+        self.uid = uid
+        self._data = {}
+        self._lock = _Lock()
+
+    @staticmethod
+    def _copy(value):
+        import pickle
+        return pickle.loads(pickle.dumps(value))
+
+    def has(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str):
+        try:
+            return self._copy(self._data[key])
+        except KeyError:
+            raise KeyNotExist(self.uid, key)
+
+    def put(self, key: str, value, ttl: int = None):
+        self._data[key] = self._copy(value)
+
+        return value
+
+    def get_hash(self, key: str, hash_keys: list = None) -> dict:
+        try:
+            value = self._copy(self._data[key])
+        except KeyError:
+            raise KeyNotExist(self.uid, key)
+
+        return {k: v for k, v in value.items() if k in hash_keys} if hash_keys else value
+
+    def put_hash(self, key: str, value: dict, ttl: int = None):
+        self._data[key] = self._copy(dict(value))
+
+        return value
+
+    def get_hash_item(self, key: str, item_key: str, default=None):
+        return self._copy(self._data.get(key, {}).get(item_key, default))
+
+    def put_hash_item(self, key: str, item_key: str, value):
+        with self._lock:
+            self._data.setdefault(key, {})[item_key] = self._copy(value)
+
+        return value
+
+    def rm(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def size(self) -> int:
+        """Get approximate size of stored data in bytes
+        """
+        import pickle
+        return len(pickle.dumps(self._data))
+
+
+POOLS = {}
+
+
+def _create_pool(uid: str) -> MemoryPool:
+    return POOLS.setdefault(uid, MemoryPool(uid))
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# pytsite.events
+# ---------------------------------------------------------------------------------------------------------------------
+
+_LISTENERS = []
+
+
+def _events_listen(event_name: str, handler, priority: int = 0):
+    global _LISTENERS
+
+    re = _re.compile(event_name.replace('.', r'\.').replace('*', '.*?') + '$')
+    _LISTENERS.append((handler, priority, re))
+    _LISTENERS = sorted(_LISTENERS, key=lambda x: x[1])
+
+
+def _events_listeners(event_name: str) -> list:
+    return [(handler, priority, re) for handler, priority, re in _LISTENERS if re.match(event_name)]
+
+
+def _events_fire(event_name: str, **kwargs) -> list:
+    return [handler(**kwargs) for handler, priority, re in _LISTENERS if re.match(event_name)]
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# pytsite.lang
+# ---------------------------------------------------------------------------------------------------------------------
+
+TRANSLATIONS = {
+    'form@save': 'Save',
+    'form@forward': 'Next',
+    'form@backward': 'Back',
+}
+
+
+def _lang_t(msg_id: str, args: dict = None, *_args, **_kwargs) -> str:
+    return TRANSLATIONS.get(msg_id, msg_id)
+
+
+def _lang_t_plural(msg_id: str, num: int = 2, *_args, **_kwargs) -> str:
+    return TRANSLATIONS.get(msg_id, msg_id)
+
+
+def _lang_is_translation_defined(msg_id: str, *_args, **_kwargs) -> bool:
+    return msg_id in TRANSLATIONS
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# pytsite.util, pytsite.router, pytsite.tpl, pytsite.http, pytsite.routing, etc.
+# ---------------------------------------------------------------------------------------------------------------------
+
+def _random_password(length: int = 16, alpha_num: bool = False) -> str:
+    return ''.join(_random.choice(_string.ascii_letters + _string.digits) for _ in range(length))
+
+
+def _get_module_attr(name: str):
+    module, attr = name.rsplit('.', 1)
+
+    return getattr(_sys.modules[module], attr)
+
+
+def _router_url(s: str, query: dict = None, **_kwargs) -> str:
+    return s + ('?' + '&'.join('{}={}'.format(k, v) for k, v in query.items()) if query else '')
+
+
+_TPL = '<form method="{method}" action="{action}" name="{name}" enctype="{enctype}" class="{css}" data-uid="{uid}" ' \
+       'data-get-widgets-ep="{get_widgets_ep}" data-validation-ep="{validation_ep}" data-steps="{steps}" ' \
+       'data-update-location-hash="{update_location_hash}" data-assets="{assets}" {data}>' \
+       '<div class="{area_hidden_css}"></div><div class="{area_header_css}"><h4 class="{title_css}">{title}</h4>' \
+       '<div class="{messages_css}"></div></div><div class="{area_body_css}"></div>' \
+       '<div class="{area_footer_css}"></div></form>'
+
+try:
+    import jinja2 as _jinja2
+
+    # The real form's template is rendered if Jinja2 is available, so rendering costs what it costs in PytSite. As in
+    # PytSite, output is not autoescaped.
+    _JINJA_ENV = _jinja2.Environment(loader=_jinja2.FileSystemLoader(_path.join(PLUGIN_PATH, 'res', 'tpl')))
+except ImportError:
+    _JINJA_ENV = None
+
+TPL_ENGINE = 'jinja2' if _JINJA_ENV else 'format'
+
+
+def _tpl_render(tpl: str, args: dict = None) -> str:
+    """Render the form's template or, if Jinja2 is not available, the stand-in which reads the same form's attributes
+    """
+    _events_fire('pytsite.tpl@render', tpl_name=tpl, args=args)
+
+    frm = args['form']
+
+    if _JINJA_ENV:
+        return _JINJA_ENV.get_template(tpl.split('@')[-1] + '.jinja2').render(args)
+
+    return _TPL.format(
+        method=frm.method, action=frm.action, name=frm.name, enctype=frm.enctype, css=frm.css, uid=frm.uid,
+        get_widgets_ep=frm.get_widgets_ep, validation_ep=frm.validation_ep, steps=frm.steps,
+        update_location_hash=frm.update_location_hash, assets=','.join(frm.assets),
+        data=' '.join('data-{}="{}"'.format(k, v) for k, v in frm.data.items()),
+        area_hidden_css=frm.area_hidden_css, area_header_css=frm.area_header_css, title_css=frm.title_css,
+        title=frm.title if not frm.hide_title else '', messages_css=frm.messages_css,
+        area_body_css=frm.area_body_css, area_footer_css=frm.area_footer_css,
+    )
+
+
+class Request:
+    """HTTP Request Stand-in
+    """
+
+    def __init__(self, inp: dict = None, url: str = 'http://localhost/', referrer: str = 'http://localhost/',
+                 remote_addr: str = '127.0.0.1'):
+        self.inp = inp or {}
+        self.url = url
+        self.referrer = referrer
+        self.remote_addr = remote_addr
+
+
+class RuleNotFound(Exception):
+    pass
+
+
+class Forbidden(Exception):
+    pass
+
+
+class _Args(dict):
+    def add_formatter(self, key: str, formatter):
+        pass
+
+
+class Controller:
+    """Routing Controller Stand-in
+    """
+
+    def __init__(self):
+        self.args = _Args()
+        self.request = None  # type: Request
+
+    @staticmethod
+    def forbidden(description: str = None):
+        return Forbidden(description)
+
+
+class RuleError(Exception):
+    pass
+
+
+class Rule:
+    """Validation Rule Stand-in
+    """
+
+    def validate(self, value):
+        raise NotImplementedError()
+
+
+class NonEmpty(Rule):
+    def validate(self, value):
+        if value in (None, '', [], {}):
+            raise RuleError('Value must not be empty')
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# plugins.widget
+# ---------------------------------------------------------------------------------------------------------------------
+
+class Widget:
+    """Widget Stand-in
+    """
+
+    def __init__(self, uid: str = None, **kwargs):
+        self.uid = uid
+        self.name = kwargs.get('name', uid)
+        self.weight = kwargs.get('weight', 0)
+        self.form_area = kwargs.get('form_area', 'body')
+        self.form_step = kwargs.get('form_step', 1)
+        self.assets = kwargs.get('assets', [])
+        self.replaces = None
+        self.parent = None
+        self.hidden = False
+        self._children = []
+        self._rules = []
+        self._value = kwargs.get('value')
+        self._kwargs = kwargs
+
+        if kwargs.get('required'):
+            self._rules.append(NonEmpty())
+
+    @property
+    def children(self) -> list:
+        return self._children
+
+    def append_child(self, child):
+        child.parent = self
+        self._children.append(child)
+
+        return child
+
+    def replace_child(self, uid: str, replacement):
+        self._children = [replacement if c.uid == uid else c for c in self._children]
+        replacement.parent = self
+
+        return replacement
+
+    def remove_child(self, uid: str):
+        self._children = [c for c in self._children if c.uid != uid]
+
+        return self
+
+    def add_rule(self, rule):
+        self._rules.append(rule)
+
+    def clr_rules(self):
+        self._rules = []
+
+        return self
+
+    def get_val(self, **kwargs):
+        return self._value
+
+    def set_val(self, value):
+        self._value = value
+
+        return self
+
+    @property
+    def value(self):
+        return self.get_val()
+
+    @value.setter
+    def value(self, value):
+        self.set_val(value)
+
+    def validate(self):
+        for rule in self._rules:
+            rule.validate(self.get_val())
+
+    def hide(self):
+        self.hidden = True
+
+        return self
+
+    def form_submit(self, request):
+        pass
+
+    def __str__(self) -> str:
+        return '<div class="widget" data-uid="{}" data-weight="{}" data-form-area="{}">{}</div>'.format(
+            self.uid, self.weight, self.form_area, ''.join(str(c) for c in self._children))
+
+
+class Container(Widget):
+    pass
+
+
+class Input(Widget):
+    pass
+
+
+class Submit(Widget):
+    pass
+
+
+class Button(Widget):
+    pass
+
+
+def install():
+    """Install stand-ins and load the form plugin as `plugins.form`
+    """
+    if 'plugins.form' in _sys.modules:
+        return _sys.modules['plugins.form']
+
+    pytsite = _module('pytsite')
+    pytsite.__path__ = []
+    for name, attrs in {
+        'reg': dict(get=_reg_get, put=REG.__setitem__),
+        'cache': dict(get_pool=_create_pool, create_pool=_create_pool, error=_types.SimpleNamespace(
+            KeyNotExist=KeyNotExist)),
+        'events': dict(listen=_events_listen, listeners=_events_listeners, fire=_events_fire),
+        'lang': dict(t=_lang_t, t_plural=_lang_t_plural, is_translation_defined=_lang_is_translation_defined,
+                     get_current=lambda: 'en'),
+        'util': dict(random_password=_random_password, get_module_attr=_get_module_attr),
+        'router': dict(url=_router_url),
+        'tpl': dict(render=_tpl_render),
+        'http': dict(Request=Request),
+        'routing': dict(Controller=Controller, error=_types.SimpleNamespace(RuleNotFound=RuleNotFound)),
+        'formatters': dict(AboveZeroInt=lambda: None),
+        'validation': dict(rule=_types.SimpleNamespace(Rule=Rule, NonEmpty=NonEmpty),
+                           error=_types.SimpleNamespace(RuleError=RuleError)),
+        'logger': dict(error=lambda *a, **k: None, warn=lambda *a, **k: None, info=lambda *a, **k: None),
+        'threading': dict(run_in_thread=lambda *a, **k: None),
+        'cron': dict(hourly=lambda *a, **k: None, every_min=lambda *a, **k: None),
+        'console': dict(Command=object, register_command=lambda *a, **k: None),
+    }.items():
+        setattr(pytsite, name, _module('pytsite.' + name, **attrs))
+
+    plugins = _module('plugins')
+    plugins.__path__ = []
+    plugins.widget = _module('plugins.widget', Abstract=Widget, Container=Container, Input=Input,
+                             button=_types.SimpleNamespace(Submit=Submit, Button=Button))
+
+    def http_api_url(endpoint: str, rule_args: dict = None) -> str:
+        return '/api/{}/{}'.format(endpoint, '/'.join(str(v) for v in (rule_args or {}).values()))
+
+    plugins.http_api = _module('plugins.http_api', url=http_api_url, handle=lambda *a, **k: None)
+
+    spec = _importlib_util.spec_from_file_location('plugins.form', _path.join(PLUGIN_PATH, '__init__.py'),
+                                                   submodule_search_locations=[PLUGIN_PATH])
+    form = _importlib_util.module_from_spec(spec)
+    _sys.modules['plugins.form'] = form
+    spec.loader.exec_module(form)
+    plugins.form = form
+
+    return form
@@ -0,0 +1,92 @@
+"""PytSite Form Plugin Cache Operations Budgets
+
+Walks a multi-step form session through HTTP API controllers, tracking each request with strict
+`track_cache_ops()` budgets. Exits with non-zero status if any endpoint exceeds its budget, so regressions in the
+number of cache operations are caught.
+
+Usage: python bench/cache_ops.py [--lru] [--report]
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import sys
+import argparse
+from os import path
+
+sys.path.insert(0, path.dirname(__file__))
+
+import _stubs
+
+# Maximum number of cache operations (reads + writes) per request of a MultiStep form session. Validation writes each
+# of 20 step's values, LRU tier adds one version write per batch of values.
+BUDGETS = {
+    'widgets': 3,
+    'validate': 26,
+    'submit': 11,
+}
+
+
+def run(lru: bool = False, strict: bool = True) -> list:
+    """Walk through a session and get tracked operations of each request
+    """
+    if lru:
+        _stubs.REG['form.cache_lru_entries'] = 1000
+
+    _stubs.install()
+
+    import _forms
+    from plugins.form import _http_api_controllers, _storage
+
+    controllers = {
+        'widgets': _http_api_controllers.PostGetWidgets,
+        'validate': _http_api_controllers.PostValidate,
+        'submit': _http_api_controllers.PostSubmit,
+    }
+
+    frm = _forms.MultiStep(_stubs.Request())
+    uid, name = frm.uid, frm.name
+    values = {}
+    r = []
+
+    def call(endpoint: str, step: int, args: dict):
+        controller = controllers[endpoint]()
+        controller.request = _stubs.Request()
+        controller.args.update(args, __form_uid=uid, __form_name=name, __form_step=step)
+
+        ops = _storage.CacheOps(endpoint, BUDGETS[endpoint] if strict else None, strict)
+        try:
+            with ops:
+                controller.exec()
+        finally:
+            r.append((endpoint, step, ops))
+
+    for step in range(1, frm.steps + 1):
+        call('widgets', step, {})
+        values.update({'field_{}_{}'.format(step, i): 'value' for i in range(_forms.MultiStep.step_widgets_num)})
+        call('validate', step, values)
+
+    call('submit', frm.steps, values)
+
+    return r
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PytSite form plugin cache operations budgets')
+    parser.add_argument('--lru', action='store_true', help='enable in-process LRU tier')
+    parser.add_argument('--report', action='store_true', help='only report operations, do not check budgets')
+    args = parser.parse_args()
+
+    try:
+        results = run(args.lru, not args.report)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    print('{:<10} {:>5} {:>6} {:>7} {:>7}'.format('endpoint', 'step', 'reads', 'writes', 'budget'))
+    for endpoint, step, ops in results:
+        print('{:<10} {:>5} {:>6} {:>7} {:>7}'.format(endpoint, step, ops.reads, ops.writes, BUDGETS[endpoint]))
+
+
+if __name__ == '__main__':
+    main()
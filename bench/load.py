@@ -0,0 +1,171 @@
+"""PytSite Form Plugin Load Test
+
+Drives multi-step form sessions against HTTP API controllers, using in-memory stand-ins of PytSite core and cache.
+Each session renders a form, then loads and validates widgets of every step and finally submits the form.
+
+Usage: python bench/load.py [--sessions 1000] [--concurrency 8] [--invalid-ratio 0.1] [--output results.json]
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import sys
+import json
+import random
+import argparse
+import threading
+from os import path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(__file__))
+
+import _stubs
+
+form = _stubs.install()
+
+import _forms
+from plugins.form import _http_api_controllers
+
+_ENDPOINTS = {
+    'widgets': _http_api_controllers.PostGetWidgets,
+    'validate': _http_api_controllers.PostValidate,
+    'submit': _http_api_controllers.PostSubmit,
+}
+
+
+class Stats:
+    """Thread-safe collector of requests' latencies and errors
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.invalid = defaultdict(int)
+
+    def add(self, endpoint: str, latency: float, error: bool = False, invalid: bool = False):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if error:
+                self.errors[endpoint] += 1
+            if invalid:
+                self.invalid[endpoint] += 1
+
+
+def _percentile(samples: list, p: float) -> float:
+    return samples[min(int(len(samples) * p / 100), len(samples) - 1)] if samples else 0.0
+
+
+def _call(stats: Stats, endpoint: str, args: dict):
+    """Call an endpoint's controller and record its latency
+    """
+    controller = _ENDPOINTS[endpoint]()
+    controller.request = _stubs.Request()
+    controller.args.update(args)
+
+    start = perf_counter()
+    try:
+        r = controller.exec()
+        invalid = isinstance(r, dict) and r.get('status') is False
+        stats.add(endpoint, perf_counter() - start, invalid=invalid)
+        return r
+    except Exception:
+        stats.add(endpoint, perf_counter() - start, error=True)
+        raise
+
+
+def _session(stats: Stats, invalid_ratio: float):
+    """Walk through a multi-step form session
+    """
+    start = perf_counter()
+    frm = _forms.MultiStep(_stubs.Request())
+    frm.render()
+    stats.add('render', perf_counter() - start)
+
+    uid, name = frm.uid, frm.name
+    values = {}
+    for step in range(1, frm.steps + 1):
+        _call(stats, 'widgets', {'__form_uid': uid, '__form_name': name, '__form_step': step})
+
+        # Some sessions send an empty value to trigger validation errors
+        step_values = {'field_{}_{}'.format(step, i): 'value' for i in range(_forms.MultiStep.step_widgets_num)}
+        if random.random() < invalid_ratio:
+            step_values['field_{}_0'.format(step)] = ''
+        values.update(step_values)
+
+        r = _call(stats, 'validate', dict(step_values, __form_uid=uid, __form_name=name, __form_step=step))
+        if not r['status']:
+            return
+
+    _call(stats, 'submit', dict(values, __form_uid=uid))
+
+
+def _cache_size() -> int:
+    return sum(p.size for p in list(_stubs.POOLS.values()))
+
+
+def run(sessions: int, concurrency: int, invalid_ratio: float) -> dict:
+    """Run the load test
+    """
+    stats = Stats()
+    failed = 0
+    cache_before = _cache_size()
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [executor.submit(_session, stats, invalid_ratio) for _ in range(sessions)]
+        for f in futures:
+            if f.exception():
+                failed += 1
+    duration = perf_counter() - start
+
+    requests_num = sum(len(v) for v in stats.latencies.values())
+    endpoints = {}
+    for endpoint, latencies in sorted(stats.latencies.items()):
+        latencies = sorted(latencies)
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'errors': stats.errors[endpoint],
+            'invalid': stats.invalid[endpoint],
+            'error_rate': stats.errors[endpoint] / len(latencies),
+            'p50_ms': _percentile(latencies, 50) * 1000,
+            'p95_ms': _percentile(latencies, 95) * 1000,
+            'p99_ms': _percentile(latencies, 99) * 1000,
+            'max_ms': latencies[-1] * 1000,
+        }
+
+    return {
+        'sessions': sessions,
+        'failed_sessions': failed,
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'sessions_per_s': sessions / duration,
+        'requests_per_s': requests_num / duration,
+        'cache_bytes_before': cache_before,
+        'cache_bytes_after': _cache_size(),
+        'cache_bytes_per_session': (_cache_size() - cache_before) / sessions,
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PytSite form plugin HTTP API load test')
+    parser.add_argument('--sessions', type=int, default=1000, help='number of sessions')
+    parser.add_argument('--concurrency', type=int, default=8, help='number of concurrent sessions')
+    parser.add_argument('--invalid-ratio', type=float, default=0.0, help='ratio of steps with invalid values')
+    parser.add_argument('--output', help='write results to the JSON file')
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.concurrency, args.invalid_ratio)
+
+    if args.output:
+        with open(args.output, 'wt') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
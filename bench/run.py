@@ -0,0 +1,230 @@
+"""PytSite Form Plugin Benchmarks
+
+Runs offline: PytSite core and required plugins are replaced with in-memory stand-ins.
+
+Usage: python bench/run.py [--quick] [--output results.json] [--compare baseline.json] [--filter substring]
+"""
+__author__ = 'Oleksandr Shepetko'
+__email__ = 'a@shepetko.com'
+__license__ = 'MIT'
+
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from os import path
+from statistics import median, mean
+from time import perf_counter
+from datetime import datetime
+
+sys.path.insert(0, path.dirname(__file__))
+
+import _stubs
+
+form = _stubs.install()
+
+import _forms
+from plugins.form import _api, _http_api_controllers
+
+_BENCHMARKS = []
+
+
+def benchmark(name: str, number: int = 100, repeat: int = 5):
+    """Register a benchmark
+
+    Decorated function receives the number of iterations and returns a callable which performs one iteration.
+    """
+
+    def decorator(fn):
+        _BENCHMARKS.append((name, fn, number, repeat))
+        return fn
+
+    return decorator
+
+
+def _run(fn, number: int, repeat: int) -> dict:
+    """Run a benchmark and collect per-iteration timings in microseconds
+    """
+    timings = []
+
+    for _ in range(repeat):
+        iteration = fn(number)
+        start = perf_counter()
+        for i in range(number):
+            iteration(i)
+        timings.append((perf_counter() - start) / number * 1000000)
+
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_us': min(timings),
+        'median_us': median(timings),
+        'mean_us': mean(timings),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=_stubs.PLUGIN_PATH,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+@benchmark('form_init', 2000)
+def _bench_form_init(number: int):
+    req = _stubs.Request()
+
+    return lambda i: _forms.Simple(req)
+
+
+def _bench_add_widget(widgets_num: int):
+    def bench(number: int):
+        forms = [_forms.Simple(_stubs.Request()) for _ in range(number)]
+        widgets = [[_stubs.Input(uid='field_{}'.format(j)) for j in range(widgets_num)] for _ in range(number)]
+
+        def iteration(i: int):
+            frm = forms[i]
+            for w in widgets[i]:
+                frm.add_widget(w)
+
+        return iteration
+
+    return bench
+
+
+benchmark('add_widget_10', 500)(_bench_add_widget(10))
+benchmark('add_widget_100', 50)(_bench_add_widget(100))
+benchmark('add_widget_1000', 5)(_bench_add_widget(1000))
+
+
+@benchmark('get_widget_1000', 200)
+def _bench_get_widget(number: int):
+    _forms.Wide.widgets_num = 1000
+    frm = _forms.Wide(_stubs.Request()).setup_widgets()
+    _forms.Wide.widgets_num = 500
+
+    return lambda i: frm.get_widget('field_{}'.format(i * 7 % 1000))
+
+
+@benchmark('setup_widgets_cache_restore', 50)
+def _bench_setup_widgets_cache_restore(number: int):
+    # Non-standard attribute forces form to be cached
+    frm = _forms.Wide(_stubs.Request(), cached=True).setup_widgets()
+    frm.fill(_forms.values(frm))
+    uid = frm.uid
+
+    return lambda i: _api.dispense(_stubs.Request(), uid).setup_widgets()
+
+
+@benchmark('fill_validate_wide', 50)
+def _bench_fill_validate_wide(number: int):
+    frm = _forms.Wide(_stubs.Request()).setup_widgets()
+    values = _forms.values(frm)
+
+    return lambda i: frm.fill(values).validate()
+
+
+@benchmark('fill_validate_deep', 50)
+def _bench_fill_validate_deep(number: int):
+    frm = _forms.Deep(_stubs.Request()).setup_widgets()
+    values = _forms.values(frm)
+
+    return lambda i: frm.fill(values).validate()
+
+
+@benchmark('post_submit_multi_step', 50)
+def _bench_post_submit_multi_step(number: int):
+    values = {'field_{}_{}'.format(s, i): 'value' for s in range(1, 4)
+              for i in range(_forms.MultiStep.step_widgets_num)}
+    uids = [_forms.MultiStep(_stubs.Request()).uid for _ in range(number)]
+
+    def iteration(i: int):
+        controller = _http_api_controllers.PostSubmit()
+        controller.request = _stubs.Request()
+        controller.args.update(values, __form_uid=uids[i])
+        controller.exec()
+
+    return iteration
+
+
+@benchmark('render', 2000)
+def _bench_render(number: int):
+    # Data attributes make form's shell uncacheable
+    frm = _forms.Simple(_stubs.Request(), title='Title', data={'foo': 'bar'})
+
+    return lambda i: frm.render()
+
+
+@benchmark('render_shell', 2000)
+def _bench_render_shell(number: int):
+    frm = _forms.Simple(_stubs.Request(), title='Title')
+
+    return lambda i: frm.render()
+
+
+@benchmark('translate', 5000)
+def _bench_translate(number: int):
+    # Like in real plugins, form's messages are defined in its own package
+    pkg_name = _forms.Simple.get_package_name()
+    _stubs.TRANSLATIONS.update({'{}@label_{}'.format(pkg_name, i): 'Label' for i in range(50)})
+
+    return lambda i: _forms.Simple.t('label_{}'.format(i % 50))
+
+
+def _compare(results: dict, baseline: dict):
+    print('{:<32} {:>14} {:>14} {:>8}'.format('benchmark', 'baseline, us', 'current, us', 'ratio'))
+    for name, r in results.items():
+        b = baseline.get('results', {}).get(name)
+        if b:
+            print('{:<32} {:>14.2f} {:>14.2f} {:>8.2f}'.format(name, b['median_us'], r['median_us'],
+                                                            r['median_us'] / b['median_us']))
+        else:
+            print('{:<32} {:>14} {:>14.2f} {:>8}'.format(name, '-', r['median_us'], '-'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PytSite form plugin benchmarks')
+    parser.add_argument('--quick', action='store_true', help='run fewer iterations')
+    parser.add_argument('--output', help='write results to the JSON file')
+    parser.add_argument('--compare', help='compare results with the JSON file produced by previous run')
+    parser.add_argument('--filter', default='', help='run only benchmarks which names contain the substring')
+    args = parser.parse_args()
+
+    results = {}
+    for name, fn, number, repeat in _BENCHMARKS:
+        if args.filter not in name:
+            continue
+
+        if args.quick:
+            number, repeat = max(number // 10, 1), 2
+
+        _stubs.POOLS.clear()
+        results[name] = _run(fn, number, repeat)
+        print('{:<32} {:>12.2f} us'.format(name, results[name]['median_us']), file=sys.stderr)
+
+    data = {
+        'meta': {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'tpl_engine': _stubs.TPL_ENGINE,
+            'time': datetime.now().isoformat(),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'wt') as f:
+            json.dump(data, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'rt') as f:
+            _compare(results, json.load(f))
+    elif not args.output:
+        print(json.dumps(data, indent=2))
+
+
+if __name__ == '__main__':
+    main()
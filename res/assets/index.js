@@ -6,6 +6,12 @@ import {Widget} from '@pytsite/widget';
 
 const forms = {};
 
+// Promises of assets which are loaded or being loaded
+const loadedAssets = {};
+
+const dictListNameRe = /([^\[]+)\[(\w+)]\[]$/;
+const listNameRe = /\[]$/;
+
 const htmlEntityMap = {
     '&': '&amp;',
     '<': '&lt;',
@@ -23,6 +29,57 @@ function escapeHtml(s) {
     });
 }
 
+/**
+ * Load assets in parallel, skipping ones which are already loaded or being loaded
+ *
+ * @param {Array} assets
+ * @returns {Promise}
+ */
+function preloadAssets(assets) {
+    return Promise.all(assets.filter(a => a).map(a => {
+        if (!(a in loadedAssets)) {
+            // Failed asset will be loaded again by the widget which needs it
+            loadedAssets[a] = Promise.resolve(assetman.load(a)).catch(() => {
+                delete loadedAssets[a];
+            });
+        }
+
+        return loadedAssets[a];
+    }));
+}
+
+/**
+ * Parse a field element to be serialized
+ *
+ * @param {HTMLElement} em
+ * @returns {Object}
+ */
+function parseField(em) {
+    const dictListMatch = em.name.match(dictListNameRe);
+
+    return {
+        em: em,
+        name: em.name,
+        fName: dictListMatch ? dictListMatch[1] : em.name,
+        dictKey: dictListMatch ? dictListMatch[2] : null,
+        isList: !dictListMatch && listNameRe.test(em.name),
+        skip: em.getAttribute('data-skip-serialization') === 'True',
+    };
+}
+
+/**
+ * Get value of a field element
+ *
+ * @param {HTMLElement} em
+ * @returns {*}
+ */
+function getFieldValue(em) {
+    if (em.tagName === 'INPUT')
+        return em.type === 'checkbox' ? (em.checked ? em.value : null) : em.value;
+    else
+        return $(em).val();
+}
+
 function getForm(id) {
     if (id in forms)
         return forms[id];
@@ -51,7 +108,10 @@ class Form {
         this.title = em.find('.form-title');
         this.messages = em.find('.form-messages').first();
         this.widgets = {};
-        this.assets = em.data('assets').split(',');
+        this.widgetSteps = new Map();
+        this.fields = {};
+        this.assets = em.data('assets') ? String(em.data('assets')).split(',') : [];
+        this.assetsLoaded = preloadAssets(this.assets);
         this.throbber = em.find('.form-area-header .throbber');
 
         // Form ID can be passed via query
@@ -69,6 +129,17 @@ class Form {
 
         const self = this;
 
+        // Changes of fields in the form's DOM tree invalidate fields registry of affected steps
+        this.fieldsObserver = new MutationObserver(records => {
+            self.invalidateFields(records);
+        });
+        this.fieldsObserver.observe(em[0], {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            attributeFilter: ['name', 'data-skip-serialization'],
+        });
+
         // Initialize areas
         em.find('.form-area').each(function () {
             self.areas[$(this).data('formArea')] = $(this);
@@ -130,50 +201,123 @@ class Form {
         });
     }
 
+    /**
+     * Get step of the widget which contains an element
+     *
+     * @param {Node} em
+     * @returns {number|null} 0 for form's own elements, null for elements which are not in the form
+     */
+    getElementStep(em) {
+        for (; em; em = em.parentNode) {
+            if (em === this.em[0])
+                return 0;
+
+            if (this.widgetSteps.has(em))
+                return this.widgetSteps.get(em);
+        }
+
+        return null;
+    };
+
+    /**
+     * Drop fields registry of steps affected by DOM changes
+     *
+     * Only changes of elements which are or contain fields are taken into account.
+     *
+     * @param {Array} records
+     */
+    invalidateFields(records) {
+        for (let i = 0; i < records.length; i++) {
+            const rec = records[i];
+            let nodes;
+
+            if (rec.type === 'attributes')
+                nodes = [rec.target];
+            else {
+                const changed = Array.prototype.slice.call(rec.addedNodes).concat(
+                    Array.prototype.slice.call(rec.removedNodes));
+                nodes = changed.filter(n => n.nodeType === 1 && (n.matches('[name]') || n.querySelector('[name]')));
+            }
+
+            for (let j = 0; j < nodes.length; j++) {
+                // Removed elements are located by their former parent
+                const step = this.getElementStep(this.widgetSteps.has(nodes[j]) || nodes[j].parentNode ?
+                    nodes[j] : rec.target);
+
+                if (step === null) {
+                    this.fields = {};
+                    return;
+                }
+
+                delete this.fields[step];
+            }
+        }
+    };
+
+    /**
+     * Get fields of the step
+     *
+     * Fields are parsed once and kept until widgets of the step or fields in form's DOM tree are changed. Step 0
+     * contains fields which are not located in any widget.
+     *
+     * @param {number} step
+     * @returns {Array}
+     */
+    getFields(step) {
+        // Changes which are not delivered to the observer's callback yet
+        this.invalidateFields(this.fieldsObserver.takeRecords());
+
+        if (!(step in this.fields)) {
+            let ems;
+
+            if (step === 0)
+                ems = this.em.find('[name]').filter((i, em) => this.getElementStep(em) === 0);
+            else
+                ems = $(this.getWidgets(step).map(w => w.em[0])).find('[name]').addBack('[name]');
+
+            this.fields[step] = ems.toArray().map(parseField);
+        }
+
+        return this.fields[step];
+    };
+
     /**
      * Serialize form
      *
      * @param {Array} skipTags
      * @param {Array} skipNames
+     * @param {number|null} step serialize only fields of the step, all steps if null
      * @returns {Object}
      */
-    serialize(skipTags = [], skipNames = []) {
-        function getEmValue(em) {
-            if (em.tagName === 'INPUT' && em.type === 'checkbox')
-                return em.checked ? em.value : null;
-            else
-                return $(em).val();
-        }
-
+    serialize(skipTags = [], skipNames = [], step = null) {
         let r = {};
+        let fields = this.getFields(0);
 
-        // Process every element which has 'name'
-        this.em.find('[name]').each(function () {
-            const emVal = getEmValue(this);
-
-            if (skipTags.includes(this.tagName) || skipNames.includes(this.name))
-                return;
+        if (step !== null) {
+            fields = fields.concat(this.getFields(step));
+        }
+        else {
+            for (let s = 1; s <= this.currentStep; s++)
+                fields = fields.concat(this.getFields(s));
+        }
 
-            if ($(this).attr('data-skip-serialization') === 'True')
+        fields.forEach(f => {
+            if (f.skip || skipTags.includes(f.em.tagName) || skipNames.includes(f.name))
                 return;
 
-            const dictListMatch = this.name.match(/([^\[]+)\[(\w+)]\[]$/);
-            const listMatch = this.name.match(/\[]$/);
+            const emVal = getFieldValue(f.em);
+            const fName = f.fName;
 
-            let fName = this.name;
-            if (dictListMatch)
-                fName = dictListMatch[1];
-
-            if (dictListMatch) {
+            if (f.dictKey !== null) {
                 if (!(fName in r))
                     r[fName] = {};
 
-                if (!(dictListMatch[2] in r[fName]))
-                    r[fName][dictListMatch[2]] = [];
+                if (!(f.dictKey in r[fName]))
+                    r[fName][f.dictKey] = [];
 
-                r[fName][dictListMatch[2]].push(emVal);
+                r[fName][f.dictKey].push(emVal);
             }
-            else if (listMatch) {
+            else if (f.isList) {
                 if (!(fName in r))
                     r[fName] = [];
 
@@ -194,11 +338,12 @@ class Form {
      *
      * @param {string} method
      * @param {string} ep
+     * @param {number|null} step send only fields of the step, all steps if null
      * @return {Promise}
      * @private
      */
-    _request(method, ep) {
-        const data = this.serialize();
+    _request(method, ep, step = null) {
+        const data = this.serialize([], [], step);
         const self = this;
 
         Object.assign(data, {
@@ -290,6 +435,8 @@ class Form {
 
                 // Append widget to the list of loaded widgets
                 this.widgets[createdWidget.uid] = createdWidget;
+                this.widgetSteps.set(createdWidget.em[0], formStep);
+                delete this.fields[formStep];
 
                 resolve(createdWidget);
             });
@@ -354,6 +501,8 @@ class Form {
         if (!(uid in this.widgets))
             return;
 
+        delete this.fields[this.widgets[uid].formStep];
+        this.widgetSteps.delete(this.widgets[uid].em[0]);
         this.widgets[uid].em.remove();
         delete this.widgets[uid];
     };
@@ -368,25 +517,33 @@ class Form {
         return new Promise(resolve => {
             const self = this;
 
+            // Widgets of the step may be built from values of previous steps, so fields of all steps are sent
             this._request('POST', `${this.getWidgetsEp}/${this.uid}/${step}`).then(resp => {
-                const widgetsNumToLoad = resp.length;
+                const widgets = resp.widgets;
+                const widgetsNumToLoad = widgets.length;
                 let createdWidgetsNum = 0;
 
-                for (let i = 0; i < widgetsNumToLoad; i++) {
-                    self.createWidget(resp[i], step).then(() => {
-                        ++createdWidgetsNum;
+                // Load all assets of the step up front, so widgets don't have to load them one by one
+                Promise.all([self.assetsLoaded, preloadAssets(resp.assets)]).then(() => {
+                    for (let i = 0; i < widgetsNumToLoad; i++) {
+                        self.createWidget(widgets[i], step).then(() => {
+                            ++createdWidgetsNum;
 
-                        // If all widgets created and ready to be added to the form
-                        if (createdWidgetsNum === widgetsNumToLoad) {
-                            // Add each widget to the form
-                            $.each(self.getWidgets(step), (i, w) => {
-                                self.appendWidget(w);
-                            });
+                            // If all widgets created and ready to be added to the form
+                            if (createdWidgetsNum === widgetsNumToLoad) {
+                                // Add each widget to the form
+                                $.each(self.getWidgets(step), (i, w) => {
+                                    self.appendWidget(w);
+                                });
 
-                            resolve();
-                        }
-                    });
-                }
+                                // Build fields registry of the step
+                                self.getFields(step);
+
+                                resolve();
+                            }
+                        });
+                    }
+                });
             });
         });
     };
@@ -430,7 +587,7 @@ class Form {
             });
 
             const ep = self.validationEp + '/' + self.uid + '/' + self.currentStep;
-            self._request('POST', ep).then(resp => {
+            self._request('POST', ep, self.currentStep).then(resp => {
                 if (resp.status) {
                     deffer.resolve();
                 }